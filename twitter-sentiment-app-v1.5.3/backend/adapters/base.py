@@ -1,7 +1,8 @@
 
+import threading
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Iterable, Optional, List
+from typing import Iterable, Optional, List, Dict
 
 @dataclass
 class RawMention:
@@ -12,6 +13,63 @@ class RawMention:
     external_id: Optional[str]
 
 class Adapter:
+    """Base adapter.
+
+    Adapters hold long-lived clients: `open()` creates them once, `close()`
+    (or `aclose()` from the event loop that used them) releases them. They
+    can also be used as context managers.
+
+    Incremental adapters keep string state (e.g. per-ticker cursors):
+    `restore()` loads it at start, `checkpoint()` returns what changed since
+    the last `ack()`, and the collector acks once that state is committed
+    together with the batch it describes.
+
+    `fetch_since` may return a list of RawMention or, preferably, a
+    MentionBatch (see batch.py) filled directly from the API response.
+
+    `per_ticker` adapters fetch per symbol, so sharded workers can split the
+    ticker list; the others (e.g. subreddit scans) run on one worker only.
+
+    `take_stats()` returns event counts since the previous call (parse
+    errors, throttled requests, ...); the pipeline exports them as metrics.
+
+    The pipeline sets `stop_event` to its shutdown event. Adapters that loop
+    over many tickers check `stopping()` between them and return the
+    partial batch; their checkpoint then only covers what was fetched.
+    """
     source_name: str = "base"
+    per_ticker: bool = True
+    stop_event: Optional[threading.Event] = None
+
+    def open(self):
+        return self
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        self.close()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def restore(self, state: Dict[str, str]):
+        pass
+
+    def checkpoint(self) -> Dict[str, str]:
+        return {}
+
+    def ack(self, state: Dict[str, str]):
+        pass
+
+    def take_stats(self) -> Dict[str, float]:
+        return {}
+
+    def stopping(self) -> bool:
+        return self.stop_event is not None and self.stop_event.is_set()
+
     def fetch_since(self, since: datetime, tickers: List[str]) -> Iterable[RawMention]:
         raise NotImplementedError
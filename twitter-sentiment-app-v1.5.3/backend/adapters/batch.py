@@ -0,0 +1,169 @@
+
+"""Columnar mention batches.
+
+A fetch round used to build one RawMention (plus a datetime and several
+strings) per message, only for the writer to fold them into a few counters.
+MentionBatch keeps the same data as parallel arrays instead: an interned
+ticker code (int32), the epoch minute (int64), a sentiment code (int8) and
+the external id. Adapters append into it and the dedup/aggregate/insert
+stages read the columns directly. Iterating a batch still yields RawMention
+objects for code that wants them.
+
+`texts` holds the message text where the adapter has one, for the sentiment
+scorer (see backend/scoring). It is not serialized: batches are scored
+before they are spooled. `scores` is the polarity of each row in -1..1: the
+scorer's compound score, or +1 / -1 / 0 from a user tag. Minute buckets sum
+it and its square, so means and variances stay additive up to daily rollups.
+"""
+import threading
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .base import RawMention
+
+SENTIMENTS = ("pos", "neg", "neu")
+SENTI_CODE = {"pos": 0, "neg": 1, "neu": 2}
+NEU = 2
+# Polarity of a labeled row without a finer score
+POLARITY = (1.0, -1.0, 0.0)
+
+EPOCH = datetime(1970, 1, 1)
+
+# Process-wide ticker intern table: codes are stable across batches, so batches concatenate without remapping
+_names: List[str] = []
+_codes: Dict[str, int] = {}
+_intern_lock = threading.Lock()     # producer threads of all adapters intern concurrently
+
+def ticker_code(ticker: str) -> int:
+    c = _codes.get(ticker)
+    if c is None:
+        with _intern_lock:
+            c = _codes.get(ticker)
+            if c is None:
+                # Name first: a code is only handed out once ticker_name() can resolve it
+                _names.append(ticker)
+                c = _codes[ticker] = len(_names) - 1
+    return c
+
+def ticker_name(code: int) -> str:
+    return _names[code]
+
+def epoch_minute(ts: datetime) -> int:
+    """Naive-UTC datetime -> minutes since the epoch."""
+    return (ts - EPOCH) // timedelta(minutes=1)
+
+def minute_dt(minute: int) -> datetime:
+    return EPOCH + timedelta(minutes=minute)
+
+class MentionBatch:
+    __slots__ = ("source", "tickers", "minutes", "sentiments", "ids", "texts", "scores")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tickers = array("i")
+        self.minutes = array("q")
+        self.sentiments = array("b")
+        self.ids: List[Optional[str]] = []
+        self.texts: List[Optional[str]] = []
+        self.scores = array("d")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, ticker: str, minute: int, sentiment: str, external_id: Optional[str], text: Optional[str] = None,
+               score: Optional[float] = None):
+        code = SENTI_CODE.get(sentiment, NEU)
+        self.tickers.append(ticker_code(ticker))
+        self.minutes.append(minute)
+        self.sentiments.append(code)
+        self.ids.append(external_id)
+        self.texts.append(text)
+        self.scores.append(POLARITY[code] if score is None else score)
+
+    def extend(self, other: "MentionBatch"):
+        self.tickers.extend(other.tickers)
+        self.minutes.extend(other.minutes)
+        self.sentiments.extend(other.sentiments)
+        self.ids.extend(other.ids)
+        self.texts.extend(other.texts)
+        self.scores.extend(other.scores)
+
+    def take(self, idx: Iterable[int]) -> "MentionBatch":
+        """New batch with the rows at `idx`, in that order."""
+        out = MentionBatch(self.source)
+        idx = list(idx)
+        if len(idx) == len(self):
+            out.extend(self)
+            return out
+        tk, mi, se, ids, tx, sc = self.tickers, self.minutes, self.sentiments, self.ids, self.texts, self.scores
+        out.tickers = array("i", [tk[i] for i in idx])
+        out.minutes = array("q", [mi[i] for i in idx])
+        out.sentiments = array("b", [se[i] for i in idx])
+        out.ids = [ids[i] for i in idx]
+        out.texts = [tx[i] for i in idx]
+        out.scores = array("d", [sc[i] for i in idx])
+        return out
+
+    def ticker_counts(self) -> Dict[str, int]:
+        counts: Dict[int, int] = {}
+        for c in self.tickers:
+            counts[c] = counts.get(c, 0) + 1
+        return {_names[c]: n for c, n in counts.items()}
+
+    def buckets(self) -> Dict[Tuple[int, int], list]:
+        """{(ticker_code, epoch_minute): [mentions, pos, neg, neu, score sum, score^2 sum]}."""
+        out: Dict[Tuple[int, int], list] = {}
+        for key, s, p in zip(zip(self.tickers, self.minutes), self.sentiments, self.scores):
+            c = out.get(key)
+            if c is None:
+                c = out[key] = [0, 0, 0, 0, 0.0, 0.0]
+            c[0] += 1
+            c[s + 1] += 1
+            c[4] += p
+            c[5] += p * p
+        return out
+
+    def rows(self) -> Iterator[Tuple[str, int, str, Optional[str]]]:
+        """(ticker, epoch_minute, sentiment, external_id) per row."""
+        for c, m, s, x in zip(self.tickers, self.minutes, self.sentiments, self.ids):
+            yield _names[c], m, SENTIMENTS[s], x
+
+    def __iter__(self) -> Iterator[RawMention]:
+        for t, m, s, x in self.rows():
+            yield RawMention(ticker=t, ts=minute_dt(m), sentiment=s, source=self.source, external_id=x)
+
+    # --- (de)serialization for the spool -------------------------------
+
+    def to_json(self) -> dict:
+        # Ticker codes are process-local, so names travel in a per-record table
+        local: Dict[int, int] = {}
+        for c in self.tickers:
+            if c not in local:
+                local[c] = len(local)
+        return {"t": [_names[c] for c in local], "k": [local[c] for c in self.tickers],
+                "m": self.minutes.tolist(), "s": self.sentiments.tolist(), "x": self.ids,
+                "p": self.scores.tolist()}
+
+    @classmethod
+    def from_json(cls, source: str, d: dict) -> "MentionBatch":
+        out = cls(source)
+        codes = [ticker_code(t) for t in d["t"]]
+        out.tickers = array("i", [codes[k] for k in d["k"]])
+        out.minutes = array("q", d["m"])
+        out.sentiments = array("b", d["s"])
+        out.ids = list(d["x"])
+        out.texts = [None] * len(out.ids)
+        out.scores = array("d", d["p"])
+        return out
+
+def as_batch(items, source: Optional[str] = None) -> MentionBatch:
+    """Pass a MentionBatch through; pack any other iterable of RawMention (all of one source)."""
+    if isinstance(items, MentionBatch):
+        return items
+    out: Optional[MentionBatch] = MentionBatch(source) if source else None
+    for it in items:
+        if out is None:
+            out = MentionBatch(it.source)
+        out.append(it.ticker, epoch_minute(it.ts), it.sentiment, it.external_id)
+    return out if out is not None else MentionBatch(source or "")
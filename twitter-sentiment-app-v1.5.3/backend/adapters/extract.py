@@ -0,0 +1,109 @@
+
+"""Ticker extraction shared by all adapters.
+
+An Aho-Corasick automaton is built once per ticker list and finds every
+symbol (and company-name alias) in a single left-to-right pass over a text,
+independent of the universe size.
+
+Match rules:
+- `$TSLA` / `$tsla` (cashtag) always counts.
+- Bare `TSLA` counts when it is written in upper case, sits on word
+  boundaries and is not in the stop-list (`A`, `IT`, `ALL`, ... are common
+  words; they still count as cashtags).
+- Aliases such as `Tesla` count case-insensitively on word boundaries.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_STOPLIST = frozenset({
+    "A", "I", "IT", "ALL", "AN", "ARE", "AT", "BE", "BIG", "CAN", "CEO", "DD", "EV", "FOR", "GO", "HAS",
+    "HE", "IMO", "AI", "ON", "ONE", "OR", "OUT", "NOW", "NEW", "SO", "USA", "TV", "UK", "EU", "YOLO",
+    "ATH", "IPO", "ETF", "GDP", "CPI", "FED", "SEC", "LOW", "HIGH", "RUN", "REAL", "BY", "DO", "ANY",
+    "WELL", "LOVE", "PLAY", "FUN", "GOOD", "OPEN", "MAIN", "CASH", "EDIT", "TLDR", "LMAO", "LOL",
+})
+
+DEFAULT_ALIASES = {
+    "APPLE": "AAPL", "MICROSOFT": "MSFT", "TESLA": "TSLA", "NVIDIA": "NVDA", "AMAZON": "AMZN",
+}
+
+SYM, ALIAS = 0, 1
+
+def _fold(text: str) -> str:
+    """Upper-case without changing the string length (so offsets map back to `text`)."""
+    up = text.upper()
+    if len(up) == len(text):
+        return up
+    return "".join(c if len(c.upper()) != 1 else c.upper() for c in text)
+
+class TickerExtractor:
+    def __init__(self, tickers: Iterable[str], aliases: Optional[Dict[str, str]] = None,
+                 stoplist: Iterable[str] = DEFAULT_STOPLIST, bare: bool = True):
+        self.tickers = frozenset(t.strip().upper() for t in tickers if t.strip())
+        self.stoplist = frozenset(s.upper() for s in stoplist)
+        self.bare = bare
+        aliases = DEFAULT_ALIASES if aliases is None else aliases
+        patterns: List[Tuple[str, str, int]] = [(t, t, SYM) for t in self.tickers]
+        patterns += [(name.upper(), t.upper(), ALIAS) for name, t in aliases.items() if t.upper() in self.tickers]
+        self._build(patterns)
+
+    def _build(self, patterns: List[Tuple[str, str, int]]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[Tuple[int, str, int]]] = [[]]
+        for word, ticker, kind in patterns:
+            s = 0
+            for ch in word:
+                nxt = goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[s][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                s = nxt
+            out[s].append((len(word), ticker, kind))
+        fail = [0] * len(goto)
+        q = deque(goto[0].values())
+        while q:
+            s = q.popleft()
+            for ch, nxt in goto[s].items():
+                q.append(nxt)
+                f = fail[s]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if goto[f].get(ch, 0) != nxt else 0
+                out[nxt] = out[nxt] + out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def extract(self, text: str) -> Set[str]:
+        """Return the set of tickers mentioned in `text`."""
+        found: Set[str] = set()
+        if not text:
+            return found
+        folded = _fold(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        n = len(text)
+        s = 0
+        for i, ch in enumerate(folded):
+            while s and ch not in goto[s]:
+                s = fail[s]
+            s = goto[s].get(ch, 0)
+            if not out[s]:
+                continue
+            for length, ticker, kind in out[s]:
+                start = i - length + 1
+                if i + 1 < n and text[i + 1].isalnum():
+                    continue
+                before = text[start - 1] if start > 0 else " "
+                if before == "$":
+                    if kind == SYM:
+                        found.add(ticker)
+                    continue
+                if before.isalnum():
+                    continue
+                if kind == ALIAS:
+                    found.add(ticker)
+                elif self.bare and ticker not in self.stoplist and text[start:i + 1].isupper():
+                    found.add(ticker)
+        return found
+
+    def extract_many(self, texts: Iterable[str]) -> List[Set[str]]:
+        return [self.extract(t) for t in texts]
@@ -0,0 +1,191 @@
+
+"""Header-aware rate governor for HTTP adapters.
+
+Wraps the local TokenBucket (even spacing inside one process) with:
+- the server's view: `X-RateLimit-Remaining` = 0 pauses until
+  `X-RateLimit-Reset`, and `Retry-After` on 429/503 pauses for that long;
+- exponential backoff with full jitter on 429, 5xx and network errors;
+- an optional shared budget (see ingest/budget.py) that several collector
+  processes draw tokens from in chunks, so together they stay at the limit,
+  and through which a pause seen by one process reaches the others.
+"""
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional, Protocol
+
+from .ratelimit import TokenBucket
+
+class SharedBudget(Protocol):
+    def claim(self, n: int) -> tuple:
+        """Take up to `n` tokens; returns (granted, seconds until more, shared pause end as unix time or 0)."""
+
+    def block(self, until: float):
+        """Pause every process sharing the budget until `until` (unix time)."""
+
+@dataclass
+class GovernorStats:
+    requests: int = 0
+    ok: int = 0
+    throttled: int = 0          # 429s
+    server_errors: int = 0      # 5xx
+    client_errors: int = 0      # other 4xx (not retried)
+    network_errors: int = 0
+    paused_sec: float = 0.0     # time spent waiting on pauses / backoff
+    last_error: str = ""
+
+def retry_after(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait according to Retry-After / X-RateLimit-* headers, or None."""
+    now = time.time() if now is None else now
+    ra = headers.get("retry-after")
+    if ra:
+        try:
+            return max(0.0, float(ra))
+        except ValueError:
+            try:
+                dt = parsedate_to_datetime(ra)
+                if dt.tzinfo is None:
+                    dt = dt.replace(tzinfo=timezone.utc)
+                return max(0.0, dt.timestamp() - now)
+            except Exception:
+                pass
+    remaining = headers.get("x-ratelimit-remaining")
+    if remaining is not None and remaining.strip() in ("0", "0.0"):
+        reset = headers.get("x-ratelimit-reset")
+        try:
+            reset = float(reset)
+            # Either an absolute unix time or seconds from now
+            return max(0.0, reset - now) if reset > 1e9 else max(0.0, reset)
+        except (TypeError, ValueError):
+            return 60.0
+    return None
+
+class RateGovernor:
+    def __init__(self, rate_per_min: int = 60, burst: int = 1, shared: Optional[SharedBudget] = None,
+                 chunk: int = 10, base_backoff: float = 1.0, max_backoff: float = 300.0, max_retries: int = 3):
+        self.bucket = TokenBucket(rate_per_min, burst=burst)
+        self.shared = shared
+        self.chunk = max(1, chunk)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+        self.stats = GovernorStats()
+        self._tokens = 0             # shared-budget tokens claimed but not used yet
+        self._paused_until = 0.0     # unix time
+        self._failures = 0           # consecutive failures, drives the backoff
+        self._lock = threading.Lock()
+
+    # --- waiting -------------------------------------------------------
+
+    def _next_wait(self) -> float:
+        """Seconds to wait before the next request may start (0 = go; a token is taken)."""
+        now = time.time()
+        with self._lock:
+            if self._paused_until > now:
+                return self._paused_until - now
+            if self.shared is None:
+                return 0.0
+            if self._tokens > 0:
+                self._tokens -= 1
+                return 0.0
+        granted, wait, paused = self.shared.claim(self.chunk)
+        with self._lock:
+            self._paused_until = max(self._paused_until, paused)
+            self._tokens += granted
+            if self._paused_until > now:
+                return self._paused_until - now
+            if self._tokens > 0:
+                self._tokens -= 1
+                return 0.0
+        return max(0.05, wait)
+
+    def acquire(self, stop: Optional[threading.Event] = None) -> bool:
+        """Wait for a request slot; False if `stop` was set during a pause (no slot taken)."""
+        while True:
+            wait = self._next_wait()
+            if wait <= 0:
+                break
+            self.stats.paused_sec += wait
+            if stop is None:
+                time.sleep(wait)
+            elif stop.wait(wait):
+                return False
+        self.bucket.acquire()
+        return True
+
+    async def acquire_async(self, stop: Optional[threading.Event] = None) -> bool:
+        while True:
+            # A shared claim is a DB round trip: keep it off the event loop
+            wait = await asyncio.to_thread(self._next_wait) if self.shared is not None else self._next_wait()
+            if wait <= 0:
+                break
+            self.stats.paused_sec += wait
+            # Pauses can last minutes: wake up now and then to honour `stop`
+            while wait > 0:
+                if stop is not None and stop.is_set():
+                    return False
+                await asyncio.sleep(min(wait, 1.0))
+                wait -= 1.0
+        await self.bucket.acquire_async()
+        return True
+
+    # --- feedback ------------------------------------------------------
+
+    def _pause(self, seconds: float, share: bool):
+        until = time.time() + seconds
+        with self._lock:
+            self._paused_until = max(self._paused_until, until)
+        if share and self.shared is not None:
+            try:
+                self.shared.block(until)
+            except Exception as e:
+                self.stats.last_error = f"shared pause failed: {e!r}"
+
+    def _backoff(self) -> float:
+        with self._lock:
+            self._failures += 1
+            cap = min(self.max_backoff, self.base_backoff * (2 ** (self._failures - 1)))
+        return random.uniform(0, cap)
+
+    def observe(self, status: int, headers: Mapping[str, str]) -> bool:
+        """Feed back a response. Returns True when the request should be retried."""
+        self.stats.requests += 1
+        hint = retry_after(headers)
+        if status < 400:
+            self.stats.ok += 1
+            with self._lock:
+                self._failures = 0
+            if hint:
+                self._pause(hint, share=True)  # quota used up: everybody waits for the reset
+            return False
+        if status == 429:
+            self.stats.throttled += 1
+            self.stats.last_error = "HTTP 429"
+            self._pause(max(hint or 0.0, self._backoff()), share=True)
+            return True
+        if status >= 500:
+            self.stats.server_errors += 1
+            self.stats.last_error = f"HTTP {status}"
+            self._pause(max(hint or 0.0, self._backoff()), share=False)
+            return True
+        self.stats.client_errors += 1
+        self.stats.last_error = f"HTTP {status}"
+        return False
+
+    def failed(self, exc: BaseException) -> bool:
+        """Feed back a transport error (timeout, connection reset, ...). Returns True to retry."""
+        self.stats.requests += 1
+        self.stats.network_errors += 1
+        self.stats.last_error = repr(exc)
+        self._pause(self._backoff(), share=False)
+        return True
+
+    def take_stats(self) -> GovernorStats:
+        """Return the counters since the last call and reset them."""
+        with self._lock:
+            st, self.stats = self.stats, GovernorStats()
+        return st
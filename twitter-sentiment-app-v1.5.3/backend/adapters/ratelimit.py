@@ -0,0 +1,40 @@
+
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    """Token bucket shared by sync and async callers.
+
+    Tokens refill at `rate_per_min / 60` per second up to `burst`. Callers
+    reserve a token under a short lock and then sleep outside of it, so many
+    concurrent requests can wait on the same budget without serializing.
+    """
+
+    def __init__(self, rate_per_min: int = 60, burst: int = 1):
+        self.rate = max(1, rate_per_min) / 60.0
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token (possibly going into debt) and return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
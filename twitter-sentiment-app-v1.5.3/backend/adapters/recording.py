@@ -0,0 +1,52 @@
+
+"""Record raw API responses to JSONL (optionally gzip) for offline replay.
+
+One line per fetched page: {"ts": <unix time of the fetch>, "source": ...,
+"ticker": ..., "data": <response JSON>}. Paths ending in `.gz` are written
+as gzip (each run appends a new gzip member, which readers handle
+transparently).
+"""
+import gzip
+import json
+import threading
+import time
+from typing import IO, Iterator, Optional
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+class Recorder:
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.records = 0
+        self._fh: Optional[IO[str]] = None
+        self._lock = threading.Lock()
+
+    def write(self, source: str, ticker: str, data: dict, ts: Optional[float] = None):
+        line = json.dumps({"ts": time.time() if ts is None else ts, "source": source, "ticker": ticker, "data": data},
+                          separators=(",", ":"))
+        with self._lock:
+            if self._fh is None:
+                self._fh = _open(self.path, "a")
+            self._fh.write(line + "\n")
+            self.records += 1
+            if self.records % self.flush_every == 0:
+                self._fh.flush()
+
+    def close(self):
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+def read_records(path: str) -> Iterator[dict]:
+    """Yield recorded pages in file order; a torn last line (crash while recording) is skipped."""
+    with _open(path, "r") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
@@ -1,38 +1,221 @@
 
-from .base import Adapter, RawMention
+from .base import Adapter
+from .batch import MentionBatch
+from .extract import TickerExtractor
 from datetime import datetime
-from typing import Iterable, List
-import re
+from typing import List, Dict, Optional
+import queue
+import threading
 
-try:
-    import praw  # optional
-except Exception:
-    praw = None
+DEFAULT_SUBS = ["stocks", "wallstreetbets", "investing"]
 
-CASHTAG = re.compile(r"\$([A-Z]{1,6})")
+def _id36(fullname: str) -> int:
+    """Numeric value of a reddit fullname/id (`t3_abc` -> int('abc', 36)); ids grow over time."""
+    return int(fullname.rsplit("_", 1)[-1], 36)
+
+def _to36(n: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+        if n == 0:
+            return out
 
 class RedditAdapter(Adapter):
+    """Reddit cashtag mentions from a set of subreddits.
+
+    Polling mode walks `new()` per subreddit. Streaming mode (`stream=True`)
+    follows submissions and comments with PRAW's stream generators on a
+    background thread and `fetch_since` just drains what it has queued.
+    Both modes keep a checkpoint of the last processed fullname per
+    subreddit and kind (`sub:<name>`, `com:<name>`) so nothing is
+    processed twice across cycles or restarts.
+    """
     source_name = "reddit"
+    per_ticker = False
 
-    def __init__(self, client_id: str=None, client_secret: str=None, user_agent: str=None):
+    def __init__(self, client_id: str=None, client_secret: str=None, user_agent: str=None,
+                 subs: Optional[List[str]]=None, stream: bool=False, max_queue: int=50_000, bare_tickers: bool=True):
         self.client_id=client_id; self.client_secret=client_secret; self.user_agent=user_agent
+        self.subs = [s.strip().lower() for s in (subs or DEFAULT_SUBS) if s.strip()]
+        self.stream = stream
+        self._reddit = None
+        self.bare_tickers = bare_tickers
+        self._extractor: Optional[TickerExtractor] = None
+        self._lookup_key: tuple = ()
+        # checkpoint key -> highest processed id36 (committed view in _persisted)
+        self._marks: Dict[str, int] = {}
+        # Stream mode: checkpoint key -> highest id36 put on _queue (may run ahead of _marks until drained)
+        self._queued: Dict[str, int] = {}
+        self._marks_lock = threading.Lock()    # the stream thread and the consumer both read the marks
+        self._since: Optional[datetime] = None  # stream mode: items created before it are skipped
+        self._persisted: Dict[str, str] = {}
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max_queue)
+        self._worker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
 
-    def fetch_since(self, since: datetime, tickers: List[str]) -> Iterable[RawMention]:
-        if not praw or not self.client_id or not self.client_secret or not self.user_agent:
-            return []
-        reddit = praw.Reddit(client_id=self.client_id, client_secret=self.client_secret, user_agent=self.user_agent)
-        subs = ["stocks", "wallstreetbets", "investing"]
-        out=[]
-        for s in subs:
-            for post in reddit.subreddit(s).new(limit=200):
-                ts = datetime.fromtimestamp(post.created_utc)
-                if ts < since: 
-                    continue
-                text = f"{post.title}\n{post.selftext or ''}"
-                found = set(m.group(1).upper() for m in CASHTAG.finditer(text))
-                use = found.intersection(set(t.upper() for t in tickers))
-                if not use:
+    def open(self):
+        # One praw.Reddit per process; it keeps its own requests session (keep-alive) and OAuth token
+        if self._reddit is None and self.client_id and self.client_secret and self.user_agent:
+            try:
+                import praw  # optional, and slow to import: only when the adapter is actually used
+            except Exception:
+                return self
+            self._reddit = praw.Reddit(client_id=self.client_id, client_secret=self.client_secret, user_agent=self.user_agent)
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=10)
+            self._worker = None
+        if self._reddit is not None:
+            try:
+                self._reddit._core._requestor.close()
+            except Exception:
+                pass
+            self._reddit = None
+
+    def restore(self, state: Dict[str, str]):
+        with self._marks_lock:
+            for k, v in state.items():
+                try:
+                    self._marks[k] = _id36(v)
+                except ValueError:
                     continue
-                for t in use:
-                    out.append(RawMention(ticker=t, ts=ts, sentiment="neu", source=self.source_name, external_id=f"t3_{post.id}"))
+        self._persisted.update(state)
+
+    def checkpoint(self) -> Dict[str, str]:
+        out = {}
+        with self._marks_lock:
+            marks = list(self._marks.items())
+        for k, v in marks:
+            fullname = ("t3_" if k.startswith("sub:") else "t1_") + _to36(v)
+            if self._persisted.get(k) != fullname:
+                out[k] = fullname
         return out
+
+    def ack(self, state: Dict[str, str]):
+        self._persisted.update(state)
+
+    def _set_tickers(self, tickers: List[str]):
+        key = tuple(tickers)
+        if key != self._lookup_key or self._extractor is None:
+            self._extractor = TickerExtractor(tickers, bare=self.bare_tickers)
+            self._lookup_key = key
+
+    def _add(self, out: MentionBatch, text: str, created_utc: float, fullname: str):
+        minute = int(created_utc // 60)
+        for t in self._extractor.extract(text):
+            out.append(t, minute, "neu", fullname, text)
+
+    def _claim(self, key: str, fullname: str) -> bool:
+        """Stream side: True (and raise the queued mark) if `fullname` was neither processed nor queued yet.
+
+        A rebuilt stream replays its newest ~100 items, some of which may still
+        be waiting in the queue; the queued mark keeps them from going in twice.
+        """
+        v = _id36(fullname)
+        with self._marks_lock:
+            if v <= max(self._marks.get(key, 0), self._queued.get(key, 0)):
+                return False
+            self._queued[key] = v
+            return True
+
+    def _advance(self, key: str, fullname: str):
+        v = _id36(fullname)
+        with self._marks_lock:
+            if v > self._marks.get(key, 0):
+                self._marks[key] = v
+
+    # --- polling -------------------------------------------------------
+
+    def _poll(self, since: datetime) -> MentionBatch:
+        out = MentionBatch(self.source_name)
+        for s in self.subs:
+            if self.stopping():
+                break
+            key = f"sub:{s}"
+            floor = self._marks.get(key, 0)
+            for post in self._reddit.subreddit(s).new(limit=200):
+                fullname = f"t3_{post.id}"
+                ts = datetime.utcfromtimestamp(post.created_utc)
+                # new() is newest-first: stop at the first post we already processed or that is too old
+                if ts < since or _id36(fullname) <= floor:
+                    break
+                self._add(out, f"{post.title}\n{post.selftext or ''}", post.created_utc, fullname)
+                self._advance(key, fullname)
+        return out
+
+    # --- streaming -----------------------------------------------------
+
+    def _run_stream(self):
+        multi = "+".join(self.subs)
+        while not self._stop.is_set():
+            try:
+                sr = self._reddit.subreddit(multi)
+                posts = sr.stream.submissions(pause_after=-1, skip_existing=False)
+                comments = sr.stream.comments(pause_after=-1, skip_existing=False)
+                while not self._stop.is_set():
+                    idle = True
+                    for post in posts:
+                        if post is None:
+                            break
+                        idle = False
+                        self._enqueue(f"sub:{post.subreddit.display_name.lower()}", f"t3_{post.id}", post.created_utc,
+                                      f"{post.title}\n{post.selftext or ''}")
+                    for c in comments:
+                        if c is None:
+                            break
+                        idle = False
+                        self._enqueue(f"com:{c.subreddit.display_name.lower()}", f"t1_{c.id}", c.created_utc, c.body or "")
+                    if idle:
+                        self._stop.wait(1.0)
+            except Exception:
+                # Network/API hiccup: back off and rebuild the streams
+                self._stop.wait(10.0)
+
+    def _enqueue(self, key: str, fullname: str, created_utc: float, text: str):
+        # Same cut as polling: the stream's initial backlog can be of any age
+        if self._since is not None and datetime.utcfromtimestamp(created_utc) < self._since:
+            return
+        if not self._claim(key, fullname):
+            return
+        tickers = self._extractor.extract(text)
+        while not self._stop.is_set():
+            try:
+                self._queue.put((key, fullname, int(created_utc // 60), tickers, text if tickers else None), timeout=1.0)
+                return
+            except queue.Full:
+                continue
+
+    def _drain(self) -> MentionBatch:
+        out = MentionBatch(self.source_name)
+        while True:
+            try:
+                key, fullname, minute, tickers, text = self._queue.get_nowait()
+            except queue.Empty:
+                return out
+            self._advance(key, fullname)
+            for t in tickers:
+                out.append(t, minute, "neu", fullname, text)
+
+    def fetch_since(self, since: datetime, tickers: List[str]) -> MentionBatch:
+        self.open()
+        if self._reddit is None:
+            return MentionBatch(self.source_name)
+        self._set_tickers(tickers)
+        if not self.stream:
+            return self._poll(since)
+        if self._worker is None:
+            self._since = since
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run_stream, name="reddit-stream", daemon=True)
+            self._worker.start()
+        return self._drain()
+
+def from_config(cfg) -> RedditAdapter:
+    return RedditAdapter(client_id=cfg.REDDIT_CLIENT_ID, client_secret=cfg.REDDIT_CLIENT_SECRET,
+                         user_agent=cfg.REDDIT_USER_AGENT, subs=cfg.REDDIT_SUBS, stream=cfg.REDDIT_STREAM,
+                         bare_tickers=cfg.TICKER_BARE_MATCH)
@@ -0,0 +1,82 @@
+
+"""Adapter registry: name -> factory, imported only when the adapter is enabled.
+
+Built-in adapters are listed as "module:attr" strings so that e.g. `praw`
+and `httpx` are only imported for the sources that are actually used. Other
+packages can add sources without touching the collector by exposing an entry
+point in the `tradersecho.adapters` group:
+
+    [project.entry-points."tradersecho.adapters"]
+    mysource = "mypkg.adapter:from_config"
+
+A factory takes the config module and returns an Adapter (an Adapter
+subclass works too and is called without arguments).
+"""
+import importlib
+import time
+from typing import Callable, Dict, List, Union
+
+from .base import Adapter
+
+ENTRY_POINT_GROUP = "tradersecho.adapters"
+
+BUILTIN: Dict[str, str] = {
+    "stocktwits": ".stocktwits:from_config",
+    "reddit": ".reddit:from_config",
+    "replay": ".replay:from_config",
+}
+
+_registry: Dict[str, Union[str, Callable]] = dict(BUILTIN)
+_entry_points_loaded = False
+
+# name -> seconds spent importing the adapter's module (cold-start cost)
+IMPORT_TIMES: Dict[str, float] = {}
+
+class UnknownAdapter(ValueError):
+    pass
+
+def register(name: str, target: Union[str, Callable]):
+    """Add or replace an adapter: a "module:attr" string (imported lazily) or a factory."""
+    _registry[name] = target
+
+def _load_entry_points():
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    try:
+        from importlib.metadata import entry_points
+        eps = entry_points(group=ENTRY_POINT_GROUP)
+    except Exception:
+        return
+    for ep in eps:
+        # Keep the EntryPoint itself; nothing is imported until the adapter is created
+        _registry.setdefault(ep.name, ep)
+
+def available() -> List[str]:
+    _load_entry_points()
+    return sorted(_registry)
+
+def factory(name: str) -> Callable:
+    _load_entry_points()
+    target = _registry.get(name)
+    if target is None:
+        raise UnknownAdapter(f"unknown adapter {name!r} (available: {', '.join(available())})")
+    is_ep = getattr(target, "group", None) == ENTRY_POINT_GROUP
+    if not isinstance(target, str) and not is_ep:
+        return target
+    t0 = time.perf_counter()
+    if is_ep:
+        obj = target.load()
+    else:
+        mod, _, attr = target.partition(":")
+        obj = getattr(importlib.import_module(mod, __package__), attr)
+    IMPORT_TIMES[name] = time.perf_counter() - t0
+    _registry[name] = obj
+    return obj
+
+def create(name: str, config) -> Adapter:
+    f = factory(name)
+    if isinstance(f, type) and issubclass(f, Adapter):
+        return f()
+    return f(config)
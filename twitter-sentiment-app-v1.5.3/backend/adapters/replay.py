@@ -0,0 +1,132 @@
+
+"""Replay recorded StockTwits responses through the real adapter.
+
+ReplayAdapter wraps a StockTwitsAdapter whose HTTP transport serves pages
+from a recording (see recording.py) instead of the network, so replayed
+data goes through the same fetch_since -> parse -> dedup -> insert path as
+live data. Recorded time is mapped onto the wall clock at `speed` (1 = real
+time, 60 = an hour per minute, 0 = as fast as requests come in, one
+recorded page per request); a request for a ticker returns the messages
+recorded for it up to the replay clock that are newer than the request's
+`since` cursor, like the API would. Requests for older pages (`max`) come back
+empty: every recorded page is served going forward.
+"""
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+import httpx
+
+from .base import Adapter
+from .batch import EPOCH, MentionBatch
+from .recording import read_records
+from .stocktwits import StockTwitsAdapter
+
+class ReplayTransport(httpx.MockTransport):
+    def __init__(self, path: str, speed: float = 1.0, source: str = "stocktwits"):
+        super().__init__(self._handle)
+        self.speed = speed
+        self.pages: Dict[str, Deque[tuple]] = {}
+        self.total = 0
+        first = None
+        for rec in read_records(path):
+            if rec.get("source", source) != source:
+                continue
+            ts = float(rec["ts"])
+            first = ts if first is None else min(first, ts)
+            self.pages.setdefault(rec["ticker"].upper(), deque()).append((ts, rec["data"]))
+            self.total += 1
+        self.first = first or 0.0
+        self.served = 0
+        self._start: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def clock(self) -> float:
+        """Recorded time the replay has reached."""
+        if self._start is None:
+            self._start = time.monotonic()
+        if self.speed <= 0:
+            return float("inf")
+        return self.first + (time.monotonic() - self._start) * self.speed
+
+    @property
+    def exhausted(self) -> bool:
+        with self._lock:
+            return not any(self.pages.values())
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        ticker = request.url.path.rsplit("/", 1)[-1].split(".")[0].upper()
+        since = int(request.url.params.get("since") or 0)
+        now = self.clock()
+        msgs: List[dict] = []
+        with self._lock:
+            q = None if request.url.params.get("max") else self.pages.get(ticker)
+            while q and q[0][0] <= now:
+                _, data = q.popleft()
+                self.served += 1
+                msgs.extend(m for m in data.get("messages", []) if int(m.get("id") or 0) > since)
+                if self.speed <= 0:
+                    break  # as fast as possible: still one recorded page per request
+        # Newest first, one entry per id, as the stream endpoint returns them
+        uniq = {int(m.get("id") or 0): m for m in msgs}
+        body = {"symbol": {"symbol": ticker}, "messages": [uniq[k] for k in sorted(uniq, reverse=True)]}
+        return httpx.Response(200, content=json.dumps(body).encode("utf-8"),
+                              headers={"content-type": "application/json"})
+
+class ReplayAdapter(Adapter):
+    """StockTwits adapter fed from a recording; `source_name` defaults to "replay" to keep test data apart."""
+    source_name = "replay"
+
+    def __init__(self, path: str, speed: float = 1.0, source_name: str = "replay", concurrency: int = 8):
+        self.source_name = source_name
+        self.transport = ReplayTransport(path, speed=speed)
+        # No request budget: the replay clock paces the data
+        self.inner = StockTwitsAdapter(rate_per_min=10**9, burst=10**6, concurrency=concurrency, transport=self.transport)
+        self.inner.source_name = source_name
+        self.rate_per_min = self.inner.rate_per_min
+
+    def tickers(self) -> List[str]:
+        return sorted(self.transport.pages)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.transport.exhausted
+
+    def open(self):
+        self.inner.stop_event = self.stop_event
+        self.inner.open()
+        return self
+
+    def close(self):
+        self.inner.close()
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+    def restore(self, state: Dict[str, str]):
+        self.inner.restore(state)
+
+    def checkpoint(self) -> Dict[str, str]:
+        return self.inner.checkpoint()
+
+    def ack(self, state: Dict[str, str]):
+        self.inner.ack(state)
+
+    def take_stats(self) -> Dict[str, float]:
+        return self.inner.take_stats()
+
+    # `since` is wall-clock time, the recording is not: every recorded message counts and the
+    # per-ticker cursors alone keep rounds incremental
+    def fetch_since(self, since: datetime, tickers: List[str]) -> MentionBatch:
+        return self.inner.fetch_since(EPOCH, tickers)
+
+    async def afetch_since(self, since: datetime, tickers: List[str]) -> MentionBatch:
+        return await self.inner.afetch_since(EPOCH, tickers)
+
+def from_config(cfg) -> ReplayAdapter:
+    if not cfg.REPLAY_PATH:
+        raise ValueError("REPLAY_PATH is not set (a recording made with RECORD_PATH)")
+    return ReplayAdapter(cfg.REPLAY_PATH, speed=cfg.REPLAY_SPEED, concurrency=cfg.STOCKTWITS_CONCURRENCY)
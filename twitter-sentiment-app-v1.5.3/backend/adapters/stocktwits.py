@@ -1,51 +1,304 @@
 
-from .base import Adapter, RawMention
+from .base import Adapter
+from .batch import MentionBatch, epoch_minute
+from .governor import RateGovernor, SharedBudget
+from .recording import Recorder
 from datetime import datetime, timezone
-from typing import Iterable, List
-import time
+from typing import List, Dict, Optional
+import asyncio
 import httpx
 
+STREAM_URL = "https://api.stocktwits.com/api/2/streams/symbol/{}.json"
+# Messages per stream page; a full page may have older unseen messages behind it
+PAGE_SIZE = 30
+
 class StockTwitsAdapter(Adapter):
     source_name = "stocktwits"
 
-    def __init__(self, rate_per_min: int = 60):
+    def __init__(self, rate_per_min: int = 60, concurrency: int = 8, burst: int = 1,
+                 timeout: float = 15.0, max_connections: int = 10, max_keepalive: int = 10,
+                 transport: Optional[httpx.BaseTransport] = None, recorder: Optional[Recorder] = None,
+                 shared_budget: Optional[SharedBudget] = None, max_retries: int = 3, max_pages: int = 5):
         self.rate_per_min = rate_per_min
-        self._last_call = 0.0
-
-    def _throttle(self):
-        now = time.time()
-        min_interval = 60.0 / max(1, self.rate_per_min)
-        wait = min_interval - (now - self._last_call)
-        if wait > 0:
-            time.sleep(wait)
-        self._last_call = time.time()
-
-    def fetch_since(self, since: datetime, tickers: List[str]) -> Iterable[RawMention]:
-        client = httpx.Client(timeout=15.0)
-        out: list[RawMention] = []
-        since = since.replace(tzinfo=timezone.utc)
-        for t in tickers:
-            self._throttle()
-            url = f"https://api.stocktwits.com/api/2/streams/symbol/{t}.json"
+        # Pages per ticker and round when walking back to the cursor after a burst; what is left is a gap
+        self.max_pages = max(1, max_pages)
+        self.concurrency = max(1, concurrency)
+        # Local spacing + rate-limit headers + backoff, optionally drawing on a budget shared with other processes
+        self.governor = RateGovernor(rate_per_min, burst=burst, shared=shared_budget, max_retries=max_retries)
+        self.bad_payloads = 0
+        self.bad_messages = 0
+        self.gaps = 0
+        self._events: Dict[str, float] = {}
+        self.timeout = timeout
+        # All requests go to one host, so the pool limits are per-host limits
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.transport = transport  # sync+async transport (e.g. httpx.MockTransport for replay); None = the network
+        self.recorder = recorder    # if set, every fetched page is also written out for replay
+        self._client: httpx.Client | None = None
+        self._aclient: httpx.AsyncClient | None = None
+        # Highest message id fetched per ticker, sent as the API's `since` param
+        self.cursors: Dict[str, int] = {}
+        self._persisted: Dict[str, str] = {}
+        # "YYYY-MM-DDTHH:MM" -> epoch minute; messages of a page share a handful of minutes
+        self._minutes: Dict[str, int] = {}
+
+    def _new_client(self) -> httpx.Client:
+        return httpx.Client(timeout=self.timeout, limits=self.limits, transport=self.transport)
+
+    def _new_aclient(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(timeout=self.timeout, limits=self.limits, transport=self.transport)
+
+    def open(self):
+        if self._client is None:
+            self._client = self._new_client()
+        if self._aclient is None:
+            self._aclient = self._new_aclient()
+        return self
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self._aclient is not None:
+            # aclose() on the loop that used it is the clean path; from sync code close it here instead
+            client, self._aclient = self._aclient, None
             try:
-                r = client.get(url)
-                r.raise_for_status()
-                data = r.json()
-            except Exception:
-                continue
-            for msg in data.get("messages", []):
-                mid = str(msg.get("id"))
-                created_at = msg.get("created_at")
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is not None:
+                loop.create_task(client.aclose())
+            else:
                 try:
-                    ts = datetime.fromisoformat(created_at.replace("Z","+00:00"))
+                    asyncio.run(client.aclose())
                 except Exception:
-                    continue
-                if ts.replace(tzinfo=timezone.utc) < since:
-                    continue
-                st = (msg.get("entities",{}) or {}).get("sentiment",{}) or {}
-                basic = st.get("basic")
-                if basic == "Bullish": senti = "pos"
-                elif basic == "Bearish": senti = "neg"
-                else: senti = "neu"
-                out.append(RawMention(ticker=t.upper(), ts=ts.replace(tzinfo=None), sentiment=senti, source=self.source_name, external_id=mid))
+                    pass  # pooled connections tied to a loop that is gone: nothing left to release cleanly
+        if self.recorder is not None:
+            self.recorder.close()
+
+    async def aclose(self):
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+        self.close()
+
+    def restore(self, state: Dict[str, str]):
+        for t, v in state.items():
+            try:
+                self.cursors[t] = int(v)
+            except ValueError:
+                continue
+        self._persisted.update(state)
+
+    def checkpoint(self) -> Dict[str, str]:
+        return {t: str(c) for t, c in self.cursors.items() if self._persisted.get(t) != str(c)}
+
+    def ack(self, state: Dict[str, str]):
+        self._persisted.update(state)
+
+    def _params(self, t: str) -> dict:
+        c = self.cursors.get(t)
+        return {"since": c} if c else {}
+
+    def _older(self, cursor: int, data: dict, low: Optional[int], pages: int) -> Optional[dict]:
+        """Params for the page below `data`, or None once the walk reached `cursor` (or gave up: a gap)."""
+        if not cursor or len(data.get("messages", [])) < PAGE_SIZE or low is None or low <= cursor + 1:
+            return None
+        if pages >= self.max_pages:
+            self.gaps += 1
+            return None
+        return {"since": cursor, "max": low - 1}
+
+    def _minute(self, created_at: str) -> Optional[int]:
+        key = created_at[:16] if created_at.endswith("Z") else None
+        m = self._minutes.get(key) if key else None
+        if m is None:
+            try:
+                ts = datetime.fromisoformat(created_at.replace("Z","+00:00"))
+            except Exception:
+                return None
+            if ts.tzinfo is not None:
+                ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+            m = epoch_minute(ts)
+            if key:
+                if len(self._minutes) > 10_000:
+                    self._minutes.clear()
+                self._minutes[key] = m
+        return m
+
+    def _parse(self, t: str, data: dict, since: Optional[int], out: MentionBatch) -> Optional[int]:
+        """Append one stream page to `out`, advance the ticker's cursor and return the page's lowest id.
+
+        `since` is an epoch minute. With a cursor the API only returns newer
+        messages, so the time filter is skipped (it would drop backlog after
+        downtime). It returns the newest page of them: the fetch loops walk
+        older pages with `max` down to the cursor (see `_older`).
+        """
+        top = self.cursors.get(t, 0)
+        if top:
+            since = None
+        low = None
+        ticker = t.upper()
+        for msg in data.get("messages", []):
+            mid = str(msg.get("id"))
+            try:
+                i = int(mid)
+                top = max(top, i)
+                low = i if low is None else min(low, i)
+            except ValueError:
+                pass
+            created_at = msg.get("created_at")
+            m = self._minute(created_at) if isinstance(created_at, str) else None
+            if m is None:
+                self.bad_messages += 1
+                continue
+            if since is not None and m < since:
+                continue
+            st = (msg.get("entities",{}) or {}).get("sentiment",{}) or {}
+            basic = st.get("basic")
+            if basic == "Bullish": senti = "pos"
+            elif basic == "Bearish": senti = "neg"
+            else: senti = "neu"
+            out.append(ticker, m, senti, mid, msg.get("body"))
+        if top:
+            self.cursors[t] = top
+        return low
+
+    def _payload(self, r: httpx.Response) -> Optional[dict]:
+        try:
+            return r.json()
+        except ValueError:
+            self.bad_payloads += 1
+            return None
+
+    def _get(self, client: httpx.Client, t: str, params: Optional[dict] = None) -> Optional[dict]:
+        gov = self.governor
+        params = params or self._params(t)
+        for _ in range(gov.max_retries + 1):
+            if not gov.acquire(self.stop_event):
+                return None
+            try:
+                r = client.get(STREAM_URL.format(t), params=params)
+            except httpx.HTTPError as e:
+                gov.failed(e)
+                continue
+            if gov.observe(r.status_code, r.headers):
+                continue
+            return self._payload(r) if r.status_code < 400 else None
+        return None
+
+    async def _aget(self, client: httpx.AsyncClient, t: str, params: Optional[dict] = None) -> Optional[dict]:
+        gov = self.governor
+        params = params or self._params(t)
+        for _ in range(gov.max_retries + 1):
+            if not await gov.acquire_async(self.stop_event):
+                return None
+            try:
+                r = await client.get(STREAM_URL.format(t), params=params)
+            except httpx.HTTPError as e:
+                gov.failed(e)
+                continue
+            if gov.observe(r.status_code, r.headers):
+                continue
+            return self._payload(r) if r.status_code < 400 else None
+        return None
+
+    def _report(self, tickers: int):
+        """One line per round when anything went wrong, instead of dropping errors silently."""
+        st = self.governor.take_stats()
+        bad, self.bad_payloads = self.bad_payloads, 0
+        bad_msgs, self.bad_messages = self.bad_messages, 0
+        gaps, self.gaps = self.gaps, 0
+        for kind, n in (("requests", st.requests), ("http_429", st.throttled), ("http_5xx", st.server_errors),
+                        ("http_4xx", st.client_errors), ("network_error", st.network_errors),
+                        ("parse_error", bad + bad_msgs), ("paused_sec", st.paused_sec), ("page_gap", gaps)):
+            if n:
+                self._events[kind] = self._events.get(kind, 0) + n
+        failed = st.requests - st.ok
+        if failed or bad or bad_msgs or gaps:
+            print(f"[stocktwits] {tickers} tickers, {st.requests} requests: 429 x{st.throttled}, 5xx x{st.server_errors}, "
+                  f"4xx x{st.client_errors}, network x{st.network_errors}, bad json x{bad}, bad messages x{bad_msgs}, "
+                  f"gaps x{gaps}; paused {st.paused_sec:.1f}s; last error: {st.last_error}")
+
+    def take_stats(self) -> Dict[str, float]:
+        ev, self._events = self._events, {}
+        return ev
+
+    def fetch_since(self, since: datetime, tickers: List[str]) -> MentionBatch:
+        own = self._client is None
+        client = self._new_client() if own else self._client
+        out = MentionBatch(self.source_name)
+        since_min = epoch_minute(since.replace(tzinfo=None))
+        try:
+            for t in tickers:
+                if self.stopping():
+                    break   # shutdown: hand over what this round has so far
+                cursor = self.cursors.get(t, 0)
+                data, pages = self._get(client, t), 0
+                while data is not None:
+                    if self.recorder is not None:
+                        self.recorder.write(self.source_name, t, data)
+                    pages += 1
+                    params = self._older(cursor, data, self._parse(t, data, since_min, out), pages)
+                    data = self._get(client, t, params) if params else None
+                    if params and data is None:
+                        self.gaps += 1
+        finally:
+            if own:
+                client.close()
+            self._report(len(tickers))
+        return out
+
+    async def afetch_since(self, since: datetime, tickers: List[str]) -> MentionBatch:
+        """Concurrent variant of `fetch_since`.
+
+        Up to `concurrency` requests are kept in flight on one AsyncClient;
+        the governor still caps the start rate at `rate_per_min`, so a
+        rotation takes about len(tickers) / rate instead of the sum of all
+        round-trips plus sleeps. Pages are parsed on the loop thread straight
+        into one batch. On shutdown the tickers not started yet are skipped.
+        """
+        since_min = epoch_minute(since.replace(tzinfo=None))
+        sem = asyncio.Semaphore(self.concurrency)
+        out = MentionBatch(self.source_name)
+
+        async def one(client: httpx.AsyncClient, t: str):
+            cursor = self.cursors.get(t, 0)
+            params, pages = None, 0
+            while True:
+                async with sem:
+                    if self.stopping():
+                        return
+                    data = await self._aget(client, t, params)
+                if data is None:
+                    if params:
+                        self.gaps += 1
+                    return
+                if self.recorder is not None:
+                    self.recorder.write(self.source_name, t, data)
+                pages += 1
+                params = self._older(cursor, data, self._parse(t, data, since_min, out), pages)
+                if not params:
+                    return
+
+        try:
+            if self._aclient is not None:
+                await asyncio.gather(*(one(self._aclient, t) for t in tickers))
+            else:
+                async with self._new_aclient() as client:
+                    await asyncio.gather(*(one(client, t) for t in tickers))
+        finally:
+            self._report(len(tickers))
         return out
+
+def from_config(cfg) -> StockTwitsAdapter:
+    shared = None
+    if cfg.RATE_SHARED:
+        from ..db import SessionLocal
+        from ..ingest.budget import DbBudget
+        shared = DbBudget(SessionLocal, "stocktwits", cfg.STOCKTWITS_RATE_PER_MIN)
+    return StockTwitsAdapter(rate_per_min=cfg.STOCKTWITS_RATE_PER_MIN, concurrency=cfg.STOCKTWITS_CONCURRENCY,
+                             timeout=cfg.HTTP_TIMEOUT, max_connections=cfg.HTTP_MAX_CONNECTIONS,
+                             max_keepalive=cfg.HTTP_MAX_KEEPALIVE,
+                             recorder=Recorder(cfg.RECORD_PATH) if cfg.RECORD_PATH else None,
+                             shared_budget=shared, max_retries=cfg.HTTP_MAX_RETRIES, max_pages=cfg.STOCKTWITS_MAX_PAGES)
@@ -0,0 +1,28 @@
+"""mention_ids dedup ledger for aggregated mention_minutes
+
+Revision ID: 0003_mention_ids
+Revises: 0002_mentions
+Create Date: 2025-10-02 18:10:00
+"""
+from alembic import op
+import sqlalchemy as sa
+revision='0003_mention_ids'
+down_revision='0002_mentions'
+branch_labels=None
+depends_on=None
+def upgrade()->None:
+    op.create_table('mention_ids',
+        sa.Column('source',sa.String(length=32),primary_key=True),
+        sa.Column('external_id',sa.String(length=64),primary_key=True),
+        sa.Column('ts',sa.DateTime(),nullable=False)
+    )
+    op.create_index('ix_mention_ids_ts','mention_ids',['ts'])
+    # Seed the ledger with ids stored as per-message rows so they are not counted twice
+    cols = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('mention_minutes')}
+    if {'source','external_id'} <= cols:
+        op.execute("INSERT INTO mention_ids (source, external_id, ts) "
+                   "SELECT source, external_id, MIN(ts) FROM mention_minutes "
+                   "WHERE external_id IS NOT NULL GROUP BY source, external_id")
+def downgrade()->None:
+    op.drop_index('ix_mention_ids_ts',table_name='mention_ids')
+    op.drop_table('mention_ids')
@@ -0,0 +1,21 @@
+"""adapter_state for persisted fetch cursors
+
+Revision ID: 0004_adapter_state
+Revises: 0003_mention_ids
+Create Date: 2025-10-04 11:20:00
+"""
+from alembic import op
+import sqlalchemy as sa
+revision='0004_adapter_state'
+down_revision='0003_mention_ids'
+branch_labels=None
+depends_on=None
+def upgrade()->None:
+    op.create_table('adapter_state',
+        sa.Column('source',sa.String(length=32),primary_key=True),
+        sa.Column('key',sa.String(length=64),primary_key=True),
+        sa.Column('value',sa.String(length=255),nullable=False),
+        sa.Column('updated_at',sa.DateTime(),server_default=sa.func.now())
+    )
+def downgrade()->None:
+    op.drop_table('adapter_state')
@@ -0,0 +1,29 @@
+"""collector_workers + collector_leases for sharded collection
+
+Revision ID: 0005_collector_leases
+Revises: 0004_adapter_state
+Create Date: 2025-10-06 09:40:00
+"""
+from alembic import op
+import sqlalchemy as sa
+revision='0005_collector_leases'
+down_revision='0004_adapter_state'
+branch_labels=None
+depends_on=None
+def upgrade()->None:
+    op.create_table('collector_workers',
+        sa.Column('worker_id',sa.String(length=64),primary_key=True),
+        sa.Column('expires_at',sa.DateTime(),nullable=False)
+    )
+    op.create_index('ix_collector_workers_expires_at','collector_workers',['expires_at'])
+    op.create_table('collector_leases',
+        sa.Column('shard',sa.Integer(),primary_key=True,autoincrement=False),
+        sa.Column('owner',sa.String(length=64),nullable=False),
+        sa.Column('expires_at',sa.DateTime(),nullable=False)
+    )
+    op.create_index('ix_collector_leases_owner','collector_leases',['owner'])
+def downgrade()->None:
+    op.drop_index('ix_collector_leases_owner',table_name='collector_leases')
+    op.drop_table('collector_leases')
+    op.drop_index('ix_collector_workers_expires_at',table_name='collector_workers')
+    op.drop_table('collector_workers')
@@ -0,0 +1,21 @@
+"""rate_budget shared across collector processes
+
+Revision ID: 0006_rate_budget
+Revises: 0005_collector_leases
+Create Date: 2025-10-08 16:05:00
+"""
+from alembic import op
+import sqlalchemy as sa
+revision='0006_rate_budget'
+down_revision='0005_collector_leases'
+branch_labels=None
+depends_on=None
+def upgrade()->None:
+    op.create_table('rate_budget',
+        sa.Column('name',sa.String(length=32),primary_key=True),
+        sa.Column('window_start',sa.DateTime(),nullable=False),
+        sa.Column('used',sa.Integer(),nullable=False,server_default='0'),
+        sa.Column('paused_until',sa.DateTime(),nullable=True)
+    )
+def downgrade()->None:
+    op.drop_table('rate_budget')
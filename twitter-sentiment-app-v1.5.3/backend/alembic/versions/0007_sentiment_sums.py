@@ -0,0 +1,30 @@
+"""polarity sum / sum of squares on mention_minutes and daily_rollups
+
+Revision ID: 0007_sentiment_sums
+Revises: 0006_rate_budget
+Create Date: 2025-10-14 11:20:00
+"""
+from alembic import op
+import sqlalchemy as sa
+revision='0007_sentiment_sums'
+down_revision='0006_rate_budget'
+branch_labels=None
+depends_on=None
+def upgrade()->None:
+    for table in ('mention_minutes','daily_rollups'):
+        op.add_column(table,sa.Column('sentiment_sum',sa.Float(),nullable=False,server_default='0'))
+        op.add_column(table,sa.Column('sentiment_sq_sum',sa.Float(),nullable=False,server_default='0'))
+    op.add_column('daily_rollups',sa.Column('sentiment_mean',sa.Float(),nullable=False,server_default='0'))
+    op.add_column('daily_rollups',sa.Column('sentiment_var',sa.Float(),nullable=False,server_default='0'))
+    # Stored rows only have labels: polarity +1 / -1 / 0, so sum = pos - neg and sum of squares = pos + neg
+    op.execute("UPDATE mention_minutes SET sentiment_sum = pos - neg, sentiment_sq_sum = pos + neg")
+    op.execute("UPDATE daily_rollups SET sentiment_sum = pos - neg, sentiment_sq_sum = pos + neg")
+    op.execute("UPDATE daily_rollups SET sentiment_mean = sentiment_sum / mentions, "
+               "sentiment_var = sentiment_sq_sum / mentions - (sentiment_sum / mentions) * (sentiment_sum / mentions) "
+               "WHERE mentions > 0")
+def downgrade()->None:
+    op.drop_column('daily_rollups','sentiment_var')
+    op.drop_column('daily_rollups','sentiment_mean')
+    for table in ('daily_rollups','mention_minutes'):
+        op.drop_column(table,'sentiment_sq_sum')
+        op.drop_column(table,'sentiment_sum')
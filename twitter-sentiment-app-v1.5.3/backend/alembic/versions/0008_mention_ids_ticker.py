@@ -0,0 +1,55 @@
+"""key the dedup ledger and per-message rows on (source, external_id, ticker)
+
+A message naming several tickers is one row per ticker under the same
+external id; keyed on the id alone, all but one of them were dropped as
+duplicates. Ledger rows written before this revision have no ticker and
+keep ticker '' and no longer match, so a message re-fetched right after the
+upgrade can be counted once more.
+
+Revision ID: 0008_mention_ids_ticker
+Revises: 0007_sentiment_sums
+Create Date: 2025-10-16 09:40:00
+"""
+from alembic import op
+import sqlalchemy as sa
+revision='0008_mention_ids_ticker'
+down_revision='0007_sentiment_sums'
+branch_labels=None
+depends_on=None
+def _pk_name(insp):
+    return insp.get_pk_constraint('mention_ids').get('name')
+def _mm_uniques(insp):
+    cols = {c['name'] for c in insp.get_columns('mention_minutes')}
+    names = {u['name'] for u in insp.get_unique_constraints('mention_minutes')}
+    return cols, names
+def upgrade()->None:
+    insp = sa.inspect(op.get_bind())
+    pk = _pk_name(insp)
+    with op.batch_alter_table('mention_ids') as b:
+        b.add_column(sa.Column('ticker',sa.String(length=16),nullable=False,server_default=''))
+        if pk:
+            b.drop_constraint(pk,type_='primary')
+        b.create_primary_key('pk_mention_ids',['source','external_id','ticker'])
+    # The per-message columns only exist on databases created from the models
+    cols, names = _mm_uniques(insp)
+    if {'source','external_id'} <= cols:
+        with op.batch_alter_table('mention_minutes') as b:
+            if 'uq_mm_source_external' in names:
+                b.drop_constraint('uq_mm_source_external',type_='unique')
+            b.create_unique_constraint('uq_mm_source_external_ticker',['source','external_id','ticker'])
+def downgrade()->None:
+    insp = sa.inspect(op.get_bind())
+    cols, names = _mm_uniques(insp)
+    if 'uq_mm_source_external_ticker' in names:
+        with op.batch_alter_table('mention_minutes') as b:
+            b.drop_constraint('uq_mm_source_external_ticker',type_='unique')
+    # Collapse to one ledger row per (source, external_id) before narrowing the key
+    op.execute("DELETE FROM mention_ids WHERE EXISTS (SELECT 1 FROM mention_ids m "
+               "WHERE m.source = mention_ids.source AND m.external_id = mention_ids.external_id "
+               "AND m.ticker < mention_ids.ticker)")
+    pk = _pk_name(insp)
+    with op.batch_alter_table('mention_ids') as b:
+        if pk:
+            b.drop_constraint(pk,type_='primary')
+        b.create_primary_key('pk_mention_ids',['source','external_id'])
+        b.drop_column('ticker')
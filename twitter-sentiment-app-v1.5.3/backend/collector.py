@@ -1,8 +1,9 @@
 
 """Collector with adapters (package-safe)"""
-import argparse, random, time, os, sys
+import argparse, time, os, sys, signal, threading
 from datetime import datetime, timedelta
-from sqlalchemy import select
+from itertools import repeat
+from sqlalchemy import delete
 
 # Make sure 'backend' package is importable when run as a script
 ROOT = os.path.dirname(__file__)
@@ -13,72 +14,316 @@ if PARENT not in sys.path:
 # Try package-relative first, then absolute within backend
 try:
     from .db import SessionLocal, MentionMinute              # type: ignore
-    from .config import (ADAPTERS, ADAPTER_TICKERS, STOCKTWITS_RATE_PER_MIN, 
-                         REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT)  # type: ignore
-    from .adapters.stocktwits import StockTwitsAdapter       # type: ignore
-    from .adapters.reddit import RedditAdapter               # type: ignore
+    from . import config                                     # type: ignore
+    from .config import (ADAPTERS, ADAPTER_TICKERS, SEEN_CACHE_SIZE, COLLECTOR_INTERVAL_SEC, PIPELINE_QUEUE_MAX, FLUSH_MAX_ROWS, FLUSH_MAX_AGE_SEC,
+                         COLLECTOR_SCHEDULER, SCHED_MIN_INTERVAL_SEC, SCHED_MAX_INTERVAL_SEC,
+                         SPOOL_DIR, SPOOL_MAX_MB, SPOOL_SEGMENT_MB,
+                         COLLECTOR_SHARDS, COLLECTOR_WORKER_ID, LEASE_TTL_SEC,
+                         METRICS_PORT, METRICS_FILE, METRICS_INTERVAL_SEC, SHUTDOWN_TIMEOUT_SEC)  # type: ignore
+    from .adapters.registry import create as create_adapter, IMPORT_TIMES  # type: ignore
+    from .ingest.writer import bulk_insert_mentions, write_aggregated  # type: ignore
+    from .ingest.seen import SeenCache                       # type: ignore
+    from .ingest.state import WATERMARK, load_state, save_state, split_watermark  # type: ignore
+    from .ingest.bulk import copy_rows                       # type: ignore
+    from .ingest.pipeline import Pipeline                    # type: ignore
+    from .ingest.scheduler import PollScheduler              # type: ignore
+    from .ingest.spool import Spool, Replayer, encode, decode  # type: ignore
+    from .ingest.shards import ShardLeaser, default_worker_id, shard_of  # type: ignore
+    from .ingest import metrics                              # type: ignore
+    from .scoring.scorer import from_config as scorer_from_config  # type: ignore
+    from .ingest.neardup import from_config as neardup_from_config  # type: ignore
 except Exception:
     from backend.db import SessionLocal, MentionMinute       # type: ignore
-    from backend.config import (ADAPTERS, ADAPTER_TICKERS, STOCKTWITS_RATE_PER_MIN, 
-                                REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT)  # type: ignore
-    from backend.adapters.stocktwits import StockTwitsAdapter  # type: ignore
-    from backend.adapters.reddit import RedditAdapter          # type: ignore
-
-def _insert_minute(db, t: str, ts: datetime, pos: int, neg: int, neu: int, source: str, external_id: str|None):
-    exists = False
-    if external_id:
-        exists = db.execute(select(MentionMinute.id).where(MentionMinute.source==source, MentionMinute.external_id==external_id)).scalar_one_or_none()
-    if exists:
-        return
-    mentions = max(0, pos+neg+neu)
-    db.add(MentionMinute(ticker=t, ts=ts.replace(second=0, microsecond=0), mentions=mentions, pos=pos, neg=neg, neu=neu, source=source, external_id=external_id))
-
-def backfill(days: int=14):
+    from backend import config                               # type: ignore
+    from backend.config import (ADAPTERS, ADAPTER_TICKERS, SEEN_CACHE_SIZE, COLLECTOR_INTERVAL_SEC, PIPELINE_QUEUE_MAX, FLUSH_MAX_ROWS, FLUSH_MAX_AGE_SEC,
+                                COLLECTOR_SCHEDULER, SCHED_MIN_INTERVAL_SEC, SCHED_MAX_INTERVAL_SEC,
+                                SPOOL_DIR, SPOOL_MAX_MB, SPOOL_SEGMENT_MB,
+                                COLLECTOR_SHARDS, COLLECTOR_WORKER_ID, LEASE_TTL_SEC,
+                                METRICS_PORT, METRICS_FILE, METRICS_INTERVAL_SEC, SHUTDOWN_TIMEOUT_SEC)  # type: ignore
+    from backend.adapters.registry import create as create_adapter, IMPORT_TIMES  # type: ignore
+    from backend.ingest.writer import bulk_insert_mentions, write_aggregated  # type: ignore
+    from backend.ingest.seen import SeenCache                  # type: ignore
+    from backend.ingest.state import WATERMARK, load_state, save_state, split_watermark  # type: ignore
+    from backend.ingest.bulk import copy_rows                  # type: ignore
+    from backend.ingest.pipeline import Pipeline               # type: ignore
+    from backend.ingest.scheduler import PollScheduler         # type: ignore
+    from backend.ingest.spool import Spool, Replayer, encode, decode  # type: ignore
+    from backend.ingest.shards import ShardLeaser, default_worker_id, shard_of  # type: ignore
+    from backend.ingest import metrics                         # type: ignore
+    from backend.scoring.scorer import from_config as scorer_from_config  # type: ignore
+    from backend.ingest.neardup import from_config as neardup_from_config  # type: ignore
+
+def _read_tickers(path: str) -> list[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return list(dict.fromkeys(line.strip().upper() for line in f if line.strip()))
+
+def backfill(days: int=14, tickers_file: str|None=None, source: str="twitter", seed: int|None=None):
+    """Write a synthetic day x ticker x minute grid into mention_minutes.
+
+    Each day is generated as one NumPy array and streamed through copy_rows
+    (COPY on Postgres). The run replaces any rows of `source` in the range in
+    a single transaction, so re-running it is idempotent. Empty minutes are
+    not written.
+    """
+    import numpy as np
     TICKERS = {"AAPL": 20000, "MSFT": 18000, "TSLA": 45000, "NVDA": 35000, "AMZN": 22000}
+    names = _read_tickers(tickers_file) if tickers_file else list(TICKERS)
+    rng = np.random.default_rng(seed)
+    daily = np.array([TICKERS.get(t, 0) for t in names], dtype=np.float64)
+    unknown = daily == 0
+    daily[unknown] = rng.lognormal(np.log(2000), 1.0, int(unknown.sum()))
+    base = np.maximum(1, (daily / 1440).astype(np.int64))
+    scale = np.maximum(1, base * 0.2)
+
+    end = datetime.utcnow().replace(second=0, microsecond=0)
+    start = end - timedelta(days=days)
+    total = int((end - start).total_seconds() // 60) + 1
+    cols = ("ticker", "ts", "mentions", "pos", "neg", "neu", "sentiment_sum", "sentiment_sq_sum", "source")
+    written = 0
+    t0 = time.perf_counter()
     with SessionLocal() as db:
-        end = datetime.utcnow().replace(second=0, microsecond=0)
-        start = end - timedelta(days=days)
-        cur = start
-        while cur <= end:
-            for t, daily in TICKERS.items():
-                base = max(1, int(daily/1440))
-                val = max(0, int(random.gauss(base, max(1, base*0.2))))
-                p = max(0, int(val*0.35))
-                n = max(0, int(val*0.25))
-                nn = max(0, val - p - n)
-                _insert_minute(db, t, cur, p, n, nn, "twitter", None)
-            db.commit()
-            cur += timedelta(minutes=1)
+        db.execute(delete(MentionMinute).where(MentionMinute.source==source, MentionMinute.ts>=start, MentionMinute.ts<=end))
+        for off in range(0, total, 1440):
+            m = min(1440, total - off)
+            val = np.clip(np.trunc(rng.normal(base, scale, size=(m, len(names)))), 0, None).astype(np.int64)
+            p = (val * 0.35).astype(np.int64)
+            n = (val * 0.25).astype(np.int64)
+            nn = val - p - n
+            mi, ti = np.nonzero(val)
+            stamps = [start + timedelta(minutes=off + i) for i in range(m)]
+            rows = zip((names[i] for i in ti.tolist()), (stamps[i] for i in mi.tolist()),
+                       val[mi, ti].tolist(), p[mi, ti].tolist(), n[mi, ti].tolist(), nn[mi, ti].tolist(),
+                       (p - n)[mi, ti].tolist(), (p + n)[mi, ti].tolist(), repeat(source))
+            written += copy_rows(db, MentionMinute.__table__, cols, rows)
+        db.commit()
+    dt = time.perf_counter() - t0
+    print(f"[collector] backfill wrote {written} rows for {len(names)} tickers x {days} days in {dt:.1f}s ({written / max(dt, 1e-9):.0f} rows/s)")
 
-def live(adapters_arg: str|None=None, tickers_arg: str|None=None):
+def live(adapters_arg: str|None=None, tickers_arg: str|None=None, per_message: bool=False,
+         tickers_file: str|None=None, scheduler: str|None=None, shards: int|None=None, worker_id: str|None=None):
     adapters_list = [a.strip() for a in (adapters_arg or ",".join(ADAPTERS)).split(",") if a.strip()]
-    tickers = [t.strip().upper() for t in (tickers_arg or ",".join(ADAPTER_TICKERS)).split(",") if t.strip()]
-    adapters = []
-    if "stocktwits" in adapters_list:
-        adapters.append(StockTwitsAdapter(rate_per_min=STOCKTWITS_RATE_PER_MIN))
-    if "reddit" in adapters_list:
-        adapters.append(RedditAdapter(client_id=REDDIT_CLIENT_ID, client_secret=REDDIT_CLIENT_SECRET, user_agent=REDDIT_USER_AGENT))
-
-    last = datetime.utcnow() - timedelta(minutes=10)
+    if tickers_file:
+        tickers = _read_tickers(tickers_file)
+    else:
+        tickers = [t.strip().upper() for t in (tickers_arg or ",".join(ADAPTER_TICKERS)).split(",") if t.strip()]
+    # Only the enabled adapters' modules (and their client libraries) are imported
+    adapters = [create_adapter(name, config) for name in adapters_list]
+    print("[collector] adapters: " + ", ".join(f"{a.source_name} (import {IMPORT_TIMES.get(n, 0) * 1000:.0f} ms)"
+                                              for n, a in zip(adapters_list, adapters)))
+
+    shards = COLLECTOR_SHARDS if shards is None else shards
+    worker_id = worker_id or COLLECTOR_WORKER_ID or default_worker_id()
+    # Sharded: this worker polls only the tickers of the shards it leases (assigned below, before the pipeline starts)
+    leaser = ShardLeaser(worker_id, shards, ttl=LEASE_TTL_SEC) if shards > 0 else None
+    universe, tickers = tickers, ([] if leaser else tickers)
+
+    schedulers = {}
+    if (scheduler or COLLECTOR_SCHEDULER) == "adaptive":
+        for a in adapters:
+            rate = getattr(a, "rate_per_min", None)
+            if not a.per_ticker or not rate:
+                continue
+            # Spend the adapter's request budget on tickers with fresh traffic; one round = one interval's worth of requests
+            schedulers[a.source_name] = PollScheduler(tickers, min_interval=SCHED_MIN_INTERVAL_SEC, max_interval=SCHED_MAX_INTERVAL_SEC,
+                                                      batch=max(1, int(rate * COLLECTOR_INTERVAL_SEC / 60)))
+
+    per_ticker = {a.source_name for a in adapters if a.per_ticker}
+
+    def leased_state(source, state):
+        # Cursors of shards already released (e.g. spooled before the hand-off) would overwrite the new owner's
+        if leaser is None:
+            return state
+        if source not in per_ticker:
+            return state if leaser.holds(0) else {}
+        return {k: v for k, v in state.items() if k == WATERMARK or leaser.holds(shard_of(k, leaser.shards))}
+
+    def write(entries):
+        # entries: (source, items, state); one transaction for all of them
+        t0 = time.perf_counter()
+        results = []
+        with SessionLocal() as db:
+            for source, items, state in entries:
+                # Default: one row per (ticker, minute, source) bucket; --per-message keeps the old row-per-message layout
+                res = bulk_insert_mentions(db, items) if per_message else write_aggregated(db, items)
+                if len(items):
+                    print(f"[collector] {source}: inserted {res.inserted}, deduped {res.deduped}, buckets {res.buckets}")
+                save_state(db, source, leased_state(source, state))
+                results.append((source, items, res))
+            db.commit()
+        metrics.INSERT_SECONDS.observe(time.perf_counter() - t0)
+        for source, items, res in results:
+            metrics.INSERT_ROWS.observe(len(items), source=source)
+            metrics.INSERTED.inc(res.inserted, source=source)
+            metrics.DEDUPED.inc(res.deduped, source=source, stage="db")
+            if len(items):
+                metrics.stored(source, max(items.minutes) * 60)
+
+    spool_dir = os.path.join(SPOOL_DIR, worker_id) if SPOOL_DIR and leaser else SPOOL_DIR
+    spool = Spool(spool_dir, segment_bytes=SPOOL_SEGMENT_MB << 20, max_bytes=SPOOL_MAX_MB << 20) if SPOOL_DIR else None
+    replayer = Replayer(spool, lambda records: write([decode(r) for r in records])) if spool else None
+
+    seen = SeenCache(SEEN_CACHE_SIZE)
+    spooled = spool.pending_states() if spool else {}
+    watermarks = {}
     with SessionLocal() as db:
-        while True:
-            for a in adapters:
-                items = a.fetch_since(last, tickers)
-                for it in items:
-                    pos = 1 if it.sentiment=="pos" else 0
-                    neg = 1 if it.sentiment=="neg" else 0
-                    neu = 1 if it.sentiment=="neu" else 0
-                    _insert_minute(db, it.ticker, it.ts, pos, neg, neu, a.source_name, it.external_id)
+        # Resume cursors and watermarks so a restart continues where the last commit (or spooled flush) stopped
+        for a in adapters:
+            state, wm = split_watermark({**load_state(db, a.source_name), **spooled.get(a.source_name, {})})
+            a.restore(state)
+            if wm is not None:
+                watermarks[a.source_name] = wm
+    if watermarks:
+        print("[collector] resuming from " + ", ".join(f"{k} {v:%Y-%m-%d %H:%M:%S}" for k, v in watermarks.items()))
+
+    def flush(batches):
+        # Runs on the pipeline's single writer thread
+        entries = [(b.adapter.source_name, seen.filter(b.items), b.state) for b in batches]
+        for b, (source, items, _) in zip(batches, entries):
+            metrics.DEDUPED.inc(len(b.items) - len(items), source=source, stage="cache")
+        if spool is not None:
+            # Durable once fsync'ed; the replayer moves it into the DB (SpoolFull raises -> pipeline backpressure)
+            spool.append([encode(*e) for e in entries])
+        else:
+            write(entries)
+        for b in batches:
+            b.adapter.ack(b.state)
+        for _, items, _ in entries:
+            seen.add(items)
+        metrics.SEEN_HIT_RATIO.set(seen.hit_rate)
+        if spool is not None:
+            metrics.SPOOL_BYTES.set(spool.bytes_used)
+        st = pipe.stats
+        print(f"[collector] flushed {len(batches)} batches | queue depth {st.queue_depth} (max {st.queue_max_depth}, "
+              f"producers blocked {st.put_blocked_sec:.1f}s) | seen-cache hit rate {seen.hit_rate:.1%}"
+              + (f" | score-cache hit rate {scorer.cache.hit_rate:.1%}" if scorer is not None and scorer.cache is not None else "")
+              + (f" | near-dup drop rate {neardup.drop_rate:.1%}" if neardup is not None else ""))
+        if spool is not None:
+            print(f"[collector] spool: {spool.pending_segments()} segments, {spool.bytes_used / 1e6:.1f} MB pending, "
+                  f"{replayer.replayed_items} items replayed")
+        for name, sched in schedulers.items():
+            sm = sched.summary()
+            print(f"[collector] {name} freshness: p50 {sm['staleness_p50']}s p95 {sm['staleness_p95']}s max {sm['staleness_max']}s "
+                  f"({sm['never_polled']}/{sm['tickers']} not yet polled) hot={sm['hot']}")
+
+    scorer = scorer_from_config(config)
+    neardup = neardup_from_config(config)
+    pipe = Pipeline(adapters, tickers, flush, interval=COLLECTOR_INTERVAL_SEC, queue_max=PIPELINE_QUEUE_MAX,
+                    flush_rows=FLUSH_MAX_ROWS, flush_age=FLUSH_MAX_AGE_SEC, schedulers=schedulers, watermarks=watermarks,
+                    scorer=scorer, neardup=neardup)
+
+    def rebalance():
+        before = set(leaser.owned)
+        with SessionLocal() as db:
+            # Shards moved to a peer are released once no round that polled them is in flight
+            leaser.refresh(db, settled=pipe.settled)
             db.commit()
-            last = datetime.utcnow()
-            time.sleep(30)
+        apply_shards(before)
+
+    def apply_shards(before):
+        owned = leaser.owned
+        if owned == before:
+            return
+        mine = leaser.tickers(universe)
+        gained = {t for t in mine if shard_of(t, leaser.shards) not in before}
+        with SessionLocal() as db:
+            for a in adapters:
+                if a.per_ticker:
+                    # Pick up the cursors the previous owner committed for the tickers we just took over
+                    a.restore({k: v for k, v in load_state(db, a.source_name).items() if k in gained})
+                    pipe.set_tickers(mine, a.source_name)
+                else:
+                    # Whole-feed adapters run on the worker holding shard 0, over the whole universe
+                    lead = 0 in owned
+                    if lead and 0 not in before:
+                        state, wm = split_watermark(load_state(db, a.source_name))
+                        a.restore(state)
+                        if wm is not None:
+                            pipe.set_watermark(a.source_name, wm)
+                    pipe.set_tickers(universe if lead else [], a.source_name)
+        leaser.handed_off(time.monotonic())
+        print(f"[collector] worker {worker_id}: {len(owned)}/{leaser.shards} shards, {len(mine)} tickers "
+              f"({len(leaser.members)} workers live)")
+
+    rates = metrics.RateTracker(metrics.MESSAGES, metrics.MESSAGES_PER_SEC)
+    httpd = metrics.serve(METRICS_PORT) if METRICS_PORT else None
+    stats_file = metrics.StatsFile(METRICS_FILE, METRICS_INTERVAL_SEC).start() if METRICS_FILE else None
+    if httpd is not None:
+        print(f"[collector] metrics on http://0.0.0.0:{METRICS_PORT}/metrics")
+    next_rates = time.monotonic() + METRICS_INTERVAL_SEC
+
+    # SIGINT / SIGTERM: stop fetching and drain the queue and the spool; a second signal gets the default behaviour
+    stopping = threading.Event()
+    previous = {}
+
+    def on_signal(signum, frame):
+        print(f"[collector] {signal.Signals(signum).name}: draining (again to force)")
+        stopping.set()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+    try:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            previous[sig] = signal.signal(sig, on_signal)
+    except ValueError:
+        pass  # not on the main thread: Ctrl-C still arrives as KeyboardInterrupt
+
+    if leaser is not None:
+        rebalance()
+    if replayer is not None:
+        replayer.start()  # replays leftovers from a previous run first
+    pipe.start()
+    next_lease = time.monotonic() + (leaser.renew_every if leaser else 0)
+    try:
+        while pipe.alive() and not stopping.is_set():
+            stopping.wait(1)
+            if time.monotonic() >= next_rates:
+                next_rates = time.monotonic() + METRICS_INTERVAL_SEC
+                rates.update()
+            if leaser is not None and time.monotonic() >= next_lease:
+                next_lease = time.monotonic() + leaser.renew_every
+                try:
+                    rebalance()
+                except Exception as e:
+                    print(f"[collector] lease renewal failed: {e!r}")
+                    before = set(leaser.owned)
+                    if leaser.expire():
+                        print(f"[collector] worker {worker_id}: leases expired, pausing until the DB is back")
+                        apply_shards(before)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if not pipe.stop(SHUTDOWN_TIMEOUT_SEC):
+            print(f"[collector] pipeline did not drain within {SHUTDOWN_TIMEOUT_SEC:.0f}s; unflushed batches are refetched on restart")
+        if replayer is not None:
+            replayer.stop()
+        if scorer is not None:
+            scorer.close()
+        if leaser is not None:
+            try:
+                with SessionLocal() as db:
+                    leaser.release(db)
+                    db.commit()
+            except Exception as e:
+                print(f"[collector] could not release leases (peers take over after {LEASE_TTL_SEC:.0f}s): {e!r}")
+        if stats_file is not None:
+            stats_file.stop()
+        if httpd is not None:
+            httpd.shutdown()
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     sp = ap.add_subparsers(dest="cmd")
     bf = sp.add_parser("backfill"); bf.add_argument("--days", type=int, default=14)
+    bf.add_argument("--tickers-file", type=str, default=None, help="Newline-separated tickers (e.g. symbols.txt); default: 5 built-in tickers.")
+    bf.add_argument("--source", type=str, default="twitter"); bf.add_argument("--seed", type=int, default=None)
     lv = sp.add_parser("live"); lv.add_argument("--adapters", type=str, default=None); lv.add_argument("--tickers", type=str, default=None)
+    lv.add_argument("--per-message", action="store_true", help="Write one mention_minutes row per message instead of per-minute buckets.")
+    lv.add_argument("--tickers-file", type=str, default=None, help="Newline-separated tickers (e.g. symbols.txt); overrides --tickers.")
+    lv.add_argument("--scheduler", choices=["fixed", "adaptive"], default=None, help="StockTwits polling: every ticker each interval, or velocity-adaptive.")
+    lv.add_argument("--shards", type=int, default=None, help="Virtual shards to split the tickers over with other workers (0 = off).")
+    lv.add_argument("--worker-id", type=str, default=None, help="Stable id of this worker in sharded mode (default <hostname>-<pid>).")
     args = ap.parse_args()
-    if args.cmd == "backfill": backfill(args.days)
-    elif args.cmd == "live": live(args.adapters, args.tickers)
+    if args.cmd == "backfill": backfill(args.days, args.tickers_file, args.source, args.seed)
+    elif args.cmd == "live": live(args.adapters, args.tickers, args.per_message, args.tickers_file, args.scheduler,
+                                      args.shards, args.worker_id)
     else: ap.print_help()
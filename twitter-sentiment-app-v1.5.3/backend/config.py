@@ -18,10 +18,74 @@ JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ADAPTERS = [a.strip() for a in os.getenv("ADAPTERS", "stocktwits").split(",") if a.strip()]
 ADAPTER_TICKERS = [t.strip().upper() for t in os.getenv("ADAPTER_TICKERS", "AAPL,MSFT,TSLA,NVDA,AMZN").split(",") if t.strip()]
 
+# Ticker extraction: also match bare upper-case symbols (NVDA) besides $cashtags; stop-listed words never match bare
+TICKER_BARE_MATCH = os.getenv("TICKER_BARE_MATCH", "1").lower() in ("1", "true", "yes")
+
+# Pooled HTTP clients (one per adapter, reused for the life of the process)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "10"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))  # per request, on 429 / 5xx / network errors (with backoff)
+
+# Collector
+SEEN_CACHE_SIZE = int(os.getenv("SEEN_CACHE_SIZE", "100000"))  # external ids remembered per source
+COLLECTOR_INTERVAL_SEC = float(os.getenv("COLLECTOR_INTERVAL_SEC", "30"))  # per-adapter poll interval
+PIPELINE_QUEUE_MAX = int(os.getenv("PIPELINE_QUEUE_MAX", "64"))           # fetched batches waiting for the writer
+FLUSH_MAX_ROWS = int(os.getenv("FLUSH_MAX_ROWS", "5000"))
+FLUSH_MAX_AGE_SEC = float(os.getenv("FLUSH_MAX_AGE_SEC", "5"))
+COLLECTOR_SCHEDULER = os.getenv("COLLECTOR_SCHEDULER", "fixed")                 # fixed | adaptive
+SCHED_MIN_INTERVAL_SEC = float(os.getenv("SCHED_MIN_INTERVAL_SEC", "30"))
+SCHED_MAX_INTERVAL_SEC = float(os.getenv("SCHED_MAX_INTERVAL_SEC", "3600"))
+# Sharded workers: tickers hash into COLLECTOR_SHARDS virtual shards leased via the DB (0 = single worker)
+COLLECTOR_SHARDS = int(os.getenv("COLLECTOR_SHARDS", "0"))
+COLLECTOR_WORKER_ID = os.getenv("COLLECTOR_WORKER_ID", "")  # default <hostname>-<pid>
+LEASE_TTL_SEC = float(os.getenv("LEASE_TTL_SEC", "30"))
+# Durable spool between fetching and the DB (off by default); empty SPOOL_DIR writes straight to the DB
+SPOOL_DIR = os.getenv("SPOOL_DIR", "")
+SPOOL_MAX_MB = int(os.getenv("SPOOL_MAX_MB", "1024"))
+SPOOL_SEGMENT_MB = int(os.getenv("SPOOL_SEGMENT_MB", "16"))
+# Collector metrics (Prometheus text): served on METRICS_PORT (0 = off) and/or rewritten to METRICS_FILE
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_INTERVAL_SEC = float(os.getenv("METRICS_INTERVAL_SEC", "15"))
+# SIGINT/SIGTERM: how long to wait for in-flight fetches and queued batches to be written
+SHUTDOWN_TIMEOUT_SEC = float(os.getenv("SHUTDOWN_TIMEOUT_SEC", "60"))
+
+# Sentiment scoring of unlabeled mentions (Reddit; StockTwits without a Bullish/Bearish tag): lexicon | off
+SENTIMENT_SCORER = os.getenv("SENTIMENT_SCORER", "lexicon").lower()
+SCORER_LEXICON = os.getenv("SCORER_LEXICON", "")  # optional token<TAB>weight file, extends/overrides the built-in lexicon
+SCORER_THRESHOLD = float(os.getenv("SCORER_THRESHOLD", "0.05"))
+# Scoring processes: 1 = in the producer threads, 0 = one per core; batches under SCORER_MIN_PARALLEL stay in-process
+SCORER_WORKERS = int(os.getenv("SCORER_WORKERS", "1"))
+SCORER_CHUNK = int(os.getenv("SCORER_CHUNK", "2000"))
+SCORER_MIN_PARALLEL = int(os.getenv("SCORER_MIN_PARALLEL", "4000"))
+# Scores cached by normalized-text hash: in-memory LRU entries (0 = off), optional SQLite file tier
+SCORE_CACHE_SIZE = int(os.getenv("SCORE_CACHE_SIZE", "100000"))
+SCORE_CACHE_PATH = os.getenv("SCORE_CACHE_PATH", "")
+# Near-duplicate spam (same text across tickers): dropped if its word pairs overlap a message seen in the last
+# NEARDUP_WINDOW_SEC (0 = off, the default) by at least NEARDUP_THRESHOLD (Jaccard); texts under NEARDUP_MIN_TOKENS words are kept
+NEARDUP_WINDOW_SEC = float(os.getenv("NEARDUP_WINDOW_SEC", "0"))
+NEARDUP_THRESHOLD = float(os.getenv("NEARDUP_THRESHOLD", "0.4"))
+NEARDUP_MIN_TOKENS = int(os.getenv("NEARDUP_MIN_TOKENS", "6"))
+NEARDUP_CAPACITY = int(os.getenv("NEARDUP_CAPACITY", "200000"))
+
 # StockTwits config
 STOCKTWITS_RATE_PER_MIN = int(os.getenv("STOCKTWITS_RATE_PER_MIN", "60"))
+STOCKTWITS_CONCURRENCY = int(os.getenv("STOCKTWITS_CONCURRENCY", "8"))
+# Pages per ticker and round when a full page has older unseen messages behind it (max= back to the cursor)
+STOCKTWITS_MAX_PAGES = int(os.getenv("STOCKTWITS_MAX_PAGES", "5"))
+# 1 = STOCKTWITS_RATE_PER_MIN is the budget of all collector processes together (rate_budget table)
+RATE_SHARED = os.getenv("RATE_SHARED", "0").lower() in ("1", "true", "yes")
+
+# Record / replay: RECORD_PATH appends every fetched StockTwits page (JSONL, .gz ok);
+# the "replay" adapter serves REPLAY_PATH at REPLAY_SPEED x recorded time (0 = as fast as possible)
+RECORD_PATH = os.getenv("RECORD_PATH", "")
+REPLAY_PATH = os.getenv("REPLAY_PATH", "")
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", "1"))
 
 # Reddit config (optional)
 REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID")
 REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET")
 REDDIT_USER_AGENT = os.getenv("REDDIT_USER_AGENT", "Tradersecho/1.0 by example")
+REDDIT_SUBS = [s.strip() for s in os.getenv("REDDIT_SUBS", "stocks,wallstreetbets,investing").split(",") if s.strip()]
+REDDIT_STREAM = os.getenv("REDDIT_STREAM", "0").lower() in ("1", "true", "yes")
@@ -35,15 +35,56 @@ class MentionMinute(Base):
     pos: Mapped[int] = mapped_column(Integer, default=0)
     neg: Mapped[int] = mapped_column(Integer, default=0)
     neu: Mapped[int] = mapped_column(Integer, default=0)
+    # Sum and sum of squares of polarity (-1..1): additive, so rollups get mean/variance from SUMs
+    sentiment_sum: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
+    sentiment_sq_sum: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
     # New fields for adapters/dedup
     source: Mapped[str] = mapped_column(String(32), default="twitter", index=True)
     external_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     __table_args__ = (
         Index("ix_mm_ticker_ts", "ticker", "ts"),
-        UniqueConstraint("source", "external_id", name="uq_mm_source_external"),
+        # One row per ticker a message names, all under the message's external_id
+        UniqueConstraint("source", "external_id", "ticker", name="uq_mm_source_external_ticker"),
     )
 
+class MentionId(Base):
+    """(external id, ticker) pairs already folded into an aggregated mention_minutes bucket (dedup ledger)."""
+    __tablename__ = "mention_ids"
+    source: Mapped[str] = mapped_column(String(32), primary_key=True)
+    external_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    ticker: Mapped[str] = mapped_column(String(16), primary_key=True)
+    ts: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+class AdapterState(Base):
+    """Small per-adapter key/value store: fetch cursors, checkpoints, watermarks."""
+    __tablename__ = "adapter_state"
+    source: Mapped[str] = mapped_column(String(32), primary_key=True)
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[str] = mapped_column(String(255))
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class CollectorWorker(Base):
+    """Live collector workers (heartbeat); membership for sharded collection."""
+    __tablename__ = "collector_workers"
+    worker_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+class CollectorLease(Base):
+    """Which worker polls a virtual shard of the ticker universe, and until when."""
+    __tablename__ = "collector_leases"
+    shard: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    owner: Mapped[str] = mapped_column(String(64), index=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime)
+
+class RateBudget(Base):
+    """Per-minute request budget shared by all collector processes of one upstream API."""
+    __tablename__ = "rate_budget"
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    window_start: Mapped[datetime] = mapped_column(DateTime)
+    used: Mapped[int] = mapped_column(Integer, default=0)
+    paused_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
 class DailyRollup(Base):
     __tablename__ = "daily_rollups"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -53,6 +94,10 @@ class DailyRollup(Base):
     pos: Mapped[int] = mapped_column(Integer, default=0)
     neg: Mapped[int] = mapped_column(Integer, default=0)
     neu: Mapped[int] = mapped_column(Integer, default=0)
+    sentiment_sum: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
+    sentiment_sq_sum: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
+    sentiment_mean: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
+    sentiment_var: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
     interest: Mapped[float] = mapped_column(Float, default=0.0)
     zscore: Mapped[float] = mapped_column(Float, default=0.0)
 
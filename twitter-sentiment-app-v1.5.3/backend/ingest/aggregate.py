@@ -0,0 +1,54 @@
+
+"""Fold a cycle's mentions into per-(ticker, minute, source) counters.
+
+Each bucket maps to a single mention_minutes row. The row's external_id is a
+deterministic bucket key, so the existing uq_mm_source_external_ticker constraint
+doubles as the upsert target and no extra unique index is needed.
+
+Besides the label counts, a bucket carries the sum and the sum of squares of
+its rows' polarity (-1..1). Both add up across buckets, so a daily rollup
+gets the mean and variance of polarity from plain SUMs.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from ..adapters.base import RawMention
+from ..adapters.batch import MentionBatch, POLARITY, ticker_name, minute_dt
+
+BucketKey = Tuple[str, datetime, str]  # (ticker, minute, source)
+
+SENTI_INDEX = {"pos": 1, "neg": 2, "neu": 3}
+
+def minute_of(ts: datetime) -> datetime:
+    return ts.replace(second=0, microsecond=0)
+
+def bucket_id(ticker: str, minute: datetime) -> str:
+    return f"agg:{ticker}:{minute:%Y%m%d%H%M}"
+
+def aggregate(items: Iterable[RawMention]) -> Dict[BucketKey, list]:
+    """Return {(ticker, minute, source): [mentions, pos, neg, neu, score sum, score^2 sum]}."""
+    buckets: Dict[BucketKey, list] = {}
+    for it in items:
+        key = (it.ticker, minute_of(it.ts), it.source)
+        c = buckets.get(key)
+        if c is None:
+            c = buckets[key] = [0, 0, 0, 0, 0.0, 0.0]
+        i = SENTI_INDEX.get(it.sentiment, 3)
+        p = POLARITY[i - 1]
+        c[0] += 1
+        c[i] += 1
+        c[4] += p
+        c[5] += p * p
+    return buckets
+
+def aggregate_batch(batch: MentionBatch) -> Dict[BucketKey, list]:
+    """Same as `aggregate` over a columnar batch; datetimes are built per bucket, not per message."""
+    return {(ticker_name(c), minute_dt(m), batch.source): v for (c, m), v in batch.buckets().items()}
+
+def bucket_rows(buckets: Dict[BucketKey, list]) -> List[dict]:
+    return [
+        {"ticker": t, "ts": m, "source": s, "external_id": bucket_id(t, m),
+         "mentions": c[0], "pos": c[1], "neg": c[2], "neu": c[3],
+         "sentiment_sum": c[4], "sentiment_sq_sum": c[5]}
+        for (t, m, s), c in buckets.items()
+    ]
@@ -0,0 +1,66 @@
+"""Request budget shared by collector processes through one rate_budget row.
+
+Each process claims tokens in chunks for the current minute window with a
+conditional UPDATE (so concurrent claims can never exceed the limit) and
+spends them locally; a pause recorded by one process (429 / quota used up)
+reaches every other process on its next claim. Times are naive UTC from the
+collector hosts' clocks.
+"""
+from datetime import datetime, timedelta
+from typing import Tuple
+
+from sqlalchemy import select, update, insert, or_
+from sqlalchemy.exc import IntegrityError
+
+from ..db import RateBudget
+
+EPOCH = datetime(1970, 1, 1)
+
+class DbBudget:
+    def __init__(self, session_factory, name: str, limit_per_min: int):
+        self.session_factory = session_factory
+        self.name = name
+        self.limit = max(1, limit_per_min)
+
+    def _ensure(self, db):
+        t = RateBudget.__table__
+        if db.execute(select(t.c.name).where(t.c.name == self.name)).first() is None:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(t).values(name=self.name, window_start=EPOCH, used=0))
+            except IntegrityError:
+                pass  # another process created it
+
+    def claim(self, n: int) -> Tuple[int, float, float]:
+        t = RateBudget.__table__
+        now = datetime.utcnow()
+        window = now.replace(second=0, microsecond=0)
+        want = min(n, self.limit)
+        granted = 0
+        with self.session_factory() as db:
+            self._ensure(db)
+            # New window: the first claimer resets the counter
+            if db.execute(update(t).where(t.c.name == self.name, t.c.window_start < window)
+                          .values(window_start=window, used=want)).rowcount:
+                granted = want
+            else:
+                row = db.execute(select(t.c.used).where(t.c.name == self.name)).first()
+                for g in (want, min(want, self.limit - (row.used if row else self.limit))):
+                    if g > 0 and db.execute(update(t).where(t.c.name == self.name, t.c.window_start == window,
+                                                            t.c.used + g <= self.limit)
+                                            .values(used=t.c.used + g)).rowcount:
+                        granted = g
+                        break
+            paused = db.execute(select(t.c.paused_until).where(t.c.name == self.name)).scalar()
+            db.commit()
+        wait = 0.0 if granted else (window + timedelta(minutes=1) - now).total_seconds()
+        return granted, wait, (paused - EPOCH).total_seconds() if paused else 0.0
+
+    def block(self, until: float):
+        t = RateBudget.__table__
+        ts = EPOCH + timedelta(seconds=until)
+        with self.session_factory() as db:
+            self._ensure(db)
+            db.execute(update(t).where(t.c.name == self.name, or_(t.c.paused_until.is_(None), t.c.paused_until < ts))
+                       .values(paused_until=ts))
+            db.commit()
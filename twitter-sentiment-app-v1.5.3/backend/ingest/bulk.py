@@ -0,0 +1,36 @@
+
+"""Bulk row loading: COPY on Postgres (psycopg 3), chunked executemany elsewhere."""
+from itertools import islice
+from typing import Iterable, Sequence
+from sqlalchemy import Table, insert
+
+CHUNK = 5000
+
+def _can_copy(db) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg"
+
+def copy_rows(db, table: Table, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+    """Stream `rows` (tuples in `columns` order) into `table` inside the caller's transaction.
+
+    Values must be plain Python types (convert NumPy arrays with .tolist()).
+    Returns the number of rows written.
+    """
+    n = 0
+    if _can_copy(db):
+        raw = db.connection().connection.driver_connection
+        cols = ", ".join(columns)
+        with raw.cursor() as cur:
+            with cur.copy(f"COPY {table.name} ({cols}) FROM STDIN") as cp:
+                for r in rows:
+                    cp.write_row(r)
+                    n += 1
+        return n
+    stmt = insert(table)
+    it = iter(rows)
+    while True:
+        chunk = [dict(zip(columns, r)) for r in islice(it, CHUNK)]
+        if not chunk:
+            return n
+        db.execute(stmt, chunk)
+        n += len(chunk)
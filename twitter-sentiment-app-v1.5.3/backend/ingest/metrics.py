@@ -0,0 +1,260 @@
+
+"""Collector metrics in the Prometheus text format.
+
+A small dependency-free registry of counters, gauges and histograms with
+labels. `serve(port)` exposes it on /metrics from a daemon thread;
+`StatsFile` rewrites a file with the same text every few seconds (atomic
+rename, so it also works with node_exporter's textfile collector). The
+instruments the collector records are defined at the bottom of this module.
+"""
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[str, ...]
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+def _labels(names: Sequence[str], values: LabelKey, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, doc, labels=()):
+        super().__init__(name, doc, labels)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def values(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name}{_labels(self.label_names, k)} {_fmt(v)}" for k, v in sorted(self.values().items())]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(self, name, doc, labels=()):
+        super().__init__(name, doc, labels)
+        self._fn: Optional[Callable[[], Dict[LabelKey, float]]] = None
+
+    def set(self, value: float, **labels):
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = value
+
+    def set_function(self, fn: Callable[[], Dict[LabelKey, float]]):
+        """Compute the values at scrape time: fn() -> {label values: value}."""
+        self._fn = fn
+
+    def values(self) -> Dict[LabelKey, float]:
+        if self._fn is not None:
+            return self._fn()
+        return super().values()
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, doc, labels=(), buckets: Sequence[float] = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, list] = {}   # [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        k = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(k)
+            if s is None:
+                s = self._series[k] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self) -> List[str]:
+        out = self.header()
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for k, s in sorted(series.items()):
+            cum = 0
+            for b, n in zip(self.buckets, s):
+                cum += n
+                le = 'le="%s"' % _fmt(b)
+                out.append(f"{self.name}_bucket{_labels(self.label_names, k, le)} {cum}")
+            le = 'le="+Inf"'
+            out.append(f"{self.name}_bucket{_labels(self.label_names, k, le)} {s[-1]}")
+            out.append(f"{self.name}_sum{_labels(self.label_names, k)} {_fmt(s[-2])}")
+            out.append(f"{self.name}_count{_labels(self.label_names, k)} {s[-1]}")
+        return out
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def add(self, m):
+        self._metrics.append(m)
+        return m
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+def serve(port: int, registry: Registry = REGISTRY, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Expose `registry` on http://host:port/metrics from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True).start()
+    return httpd
+
+class StatsFile:
+    """Rewrite `path` with the registry's text every `interval` seconds (and once on stop)."""
+
+    def __init__(self, path: str, interval: float = 15.0, registry: Registry = REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.registry.render())
+        os.replace(tmp, self.path)
+
+    def start(self):
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="metrics-file", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+        self.write()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"[metrics] could not write {self.path}: {e!r}")
+
+class RateTracker:
+    """Per-second rate of a counter's series between two `update()` calls, exposed as a gauge."""
+
+    def __init__(self, counter: Counter, gauge: Gauge):
+        self.counter = counter
+        self.gauge = gauge
+        self._last: Dict[LabelKey, float] = {}
+        self._stamp = time.monotonic()
+
+    def update(self):
+        now = time.monotonic()
+        dt = max(1e-9, now - self._stamp)
+        cur = self.counter.values()
+        with self.gauge._lock:
+            for k, v in cur.items():
+                self.gauge._values[k] = (v - self._last.get(k, 0.0)) / dt
+        self._last, self._stamp = cur, now
+
+# --- collector instruments --------------------------------------------
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+FETCH_SECONDS = REGISTRY.add(Histogram("tradersecho_fetch_seconds", "Duration of one adapter fetch round.",
+                                       ("source",), LATENCY_BUCKETS))
+MESSAGES = REGISTRY.add(Counter("tradersecho_messages_total", "Mentions fetched.", ("source",)))
+MESSAGES_PER_SEC = REGISTRY.add(Gauge("tradersecho_messages_per_second", "Mentions fetched per second (recent).", ("source",)))
+FETCH_ERRORS = REGISTRY.add(Counter("tradersecho_fetch_errors_total", "Fetch rounds that raised.", ("source",)))
+ADAPTER_EVENTS = REGISTRY.add(Counter("tradersecho_adapter_events_total",
+                                      "Adapter-reported events: parse errors, HTTP 429/5xx/4xx, network errors.",
+                                      ("source", "kind")))
+DEDUPED = REGISTRY.add(Counter("tradersecho_deduped_total", "Mentions dropped as already stored, or as near-duplicate spam (stage=neardup).", ("source", "stage")))
+INSERTED = REGISTRY.add(Counter("tradersecho_inserted_total", "Mentions newly counted in the DB.", ("source",)))
+SEEN_HIT_RATIO = REGISTRY.add(Gauge("tradersecho_seen_cache_hit_ratio", "In-process dedup cache hit ratio."))
+INSERT_ROWS = REGISTRY.add(Histogram("tradersecho_insert_batch_rows", "Mentions per DB write, per source.",
+                                     ("source",), (10, 50, 100, 500, 1000, 5000, 10000, 50000)))
+INSERT_SECONDS = REGISTRY.add(Histogram("tradersecho_insert_seconds", "Duration of one DB write transaction.",
+                                        (), LATENCY_BUCKETS))
+SCORE_SECONDS = REGISTRY.add(Histogram("tradersecho_score_seconds", "Duration of sentiment scoring per fetched batch.",
+                                       ("source",), LATENCY_BUCKETS))
+SCORED = REGISTRY.add(Counter("tradersecho_scored_total", "Unlabeled mentions labeled by the sentiment scorer.",
+                              ("source",)))
+SCORE_CACHE_HIT_RATIO = REGISTRY.add(Gauge("tradersecho_score_cache_hit_ratio", "Share of scored texts served from the score cache."))
+QUEUE_DEPTH = REGISTRY.add(Gauge("tradersecho_queue_depth", "Fetched batches waiting for the writer."))
+SPOOL_BYTES = REGISTRY.add(Gauge("tradersecho_spool_bytes", "Bytes spooled on disk, not yet in the DB."))
+LAG_SECONDS = REGISTRY.add(Gauge("tradersecho_lag_seconds", "Now minus the newest mention ts stored, per source.",
+                                 ("source",)))
+
+_newest: Dict[str, float] = {}   # source -> newest stored mention (unix time)
+_newest_lock = threading.Lock()
+
+def stored(source: str, newest_ts: float):
+    """Record that mentions up to `newest_ts` (unix time) of `source` are committed."""
+    with _newest_lock:
+        if newest_ts > _newest.get(source, 0.0):
+            _newest[source] = newest_ts
+
+def _lag() -> Dict[LabelKey, float]:
+    now = time.time()
+    with _newest_lock:
+        return {(s,): max(0.0, now - ts) for s, ts in _newest.items()}
+
+LAG_SECONDS.set_function(_lag)
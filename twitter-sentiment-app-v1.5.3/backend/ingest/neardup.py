@@ -0,0 +1,208 @@
+
+"""Streaming near-duplicate filter for message texts.
+
+Pump-and-dump bots post the same message across dozens of tickers, with
+the cashtag swapped and a word or emoji changed, and every copy counts as
+a mention. NearDupIndex drops such copies on the producer thread, before
+they are scored or queued:
+
+- signature: MinHash of the set of word pairs (bigram shingles) of the
+  message, without cashtags and the message's own ticker symbols (so
+  "$GME to the moon" and "$AMC to the moon" hash alike). `bands * rows`
+  hash functions are applied to a whole batch at once with NumPy; the
+  share of equal minima estimates the Jaccard similarity of two shingle
+  sets. Word pairs rather than words: short posts made of common words
+  share most of their words, but few of their pairs;
+- index: LSH banding. The signature is cut into `bands` bands of `rows`
+  minima; messages that agree on a whole band are candidates, and a
+  candidate whose estimated similarity reaches `threshold` is a near
+  duplicate. 10 x 3 makes a pair at 0.5 a candidate 74% of the time and
+  at 0.7 98%; every copy of a campaign that slips through is indexed too
+  and gives the next copies another chance;
+- window: signatures expire `window_sec` after they were last matched (on
+  the mentions' own minute clock, so replayed data behaves like live data),
+  and at most `capacity` are kept. A campaign that keeps posting stays
+  suppressed; one copy gets through per quiet window.
+
+MinHash rather than SimHash: on 10-30 word posts a one-word edit moves a
+64-bit SimHash about as far as unrelated texts are apart.
+
+The first copy is kept. Texts with fewer than `min_tokens` words are
+never dropped: short posts ("$TSLA to the moon 🚀") collide without
+being spam. Rows of one message (a Reddit post naming several tickers) are
+kept or dropped together, and a message re-fetched under the same id is
+left to the exact dedup stages instead of counting as its own copy. Word
+hashes use Python's `hash`, which is salted per process; the index lives
+in memory only, so that does not matter.
+"""
+import re
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from ..adapters.batch import MentionBatch, ticker_name
+from ..scoring.cache import normalize
+
+CASHTAG_RE = re.compile(r"\$[a-z][a-z0-9.]{0,9}\b")
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[\U0001F300-\U0001FAFF]")
+
+# Word hashes per MinHash step (x bands * rows minima); bounds the temporary matrix
+_MINHASH_CHUNK = 1 << 16
+
+def words(text: str, drop: Set[str] = frozenset()) -> List[str]:
+    """Words of `text`, without cashtags and the words in `drop`."""
+    return [t for t in TOKEN_RE.findall(CASHTAG_RE.sub(" ", normalize(text))) if t not in drop]
+
+def features(toks: Sequence[str]) -> List[int]:
+    """Hashes of the distinct word pairs of `toks`."""
+    return [hash(p) for p in set(zip(toks, toks[1:]))]
+
+class NearDupIndex:
+    def __init__(self, window_sec: float = 3600.0, threshold: float = 0.4, min_tokens: int = 6,
+                 capacity: int = 200_000, bands: int = 10, rows: int = 3, seed: int = 0):
+        self.window = max(1, int(window_sec // 60))     # in minutes, the batches' time unit
+        self.threshold = threshold
+        self.min_tokens = min_tokens
+        self.capacity = max(1, capacity)
+        self.bands = bands
+        self.rows = rows
+        rng = np.random.default_rng(seed)
+        # h -> a*h + b (mod 2^64) with odd a permutes the 64-bit hashes: one hash function per minimum
+        n = bands * rows
+        self._a = rng.integers(0, 1 << 63, n, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, n, dtype=np.uint64)
+        self._mix = rng.integers(0, 1 << 63, rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+        # Signatures are rows of one matrix, so all candidates of a message are compared in one step
+        self._mat = np.zeros((min(1024, self.capacity), n), dtype=np.uint64)
+        self._free: List[int] = list(range(len(self._mat) - 1, -1, -1))
+        self._slot: Dict[int, int] = {}                 # entry -> row of _mat
+        self._keys: Dict[int, List[int]] = {}           # entry -> band keys
+        self._last: Dict[int, int] = {}                 # entry -> minute last seen
+        self._owner: Dict[int, tuple] = {}              # entry -> (source, external_id) that added it
+        self._order: Deque[Tuple[int, int]] = deque()   # (minute, entry), oldest first
+        self._next = 0
+        self._clock = 0
+        self._lock = threading.Lock()                   # producers of all adapters share one index
+        self.checked = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._slot)
+
+    def signatures(self, feats: Sequence[Sequence[int]]) -> np.ndarray:
+        """(len(feats), bands * rows) MinHash minima; every feature list must be non-empty."""
+        lens = np.fromiter((len(f) for f in feats), dtype=np.int64, count=len(feats))
+        h = np.fromiter((x for f in feats for x in f), dtype=np.int64, count=int(lens.sum())).view(np.uint64)
+        starts = np.cumsum(lens) - lens
+        out = np.empty((len(feats), len(self._a)), dtype=np.uint64)
+        i = 0
+        while i < len(feats):
+            # Whole texts per step, at least one
+            j = max(i + 1, int(np.searchsorted(starts, starts[i] + _MINHASH_CHUNK, side="right")))
+            lo, hi = starts[i], starts[j - 1] + lens[j - 1]
+            out[i:j] = np.minimum.reduceat(h[lo:hi, None] * self._a + self._b, starts[i:j] - lo, axis=0)
+            i = j
+        return out
+
+    def band_keys(self, sigs: np.ndarray) -> np.ndarray:
+        return (sigs.reshape(len(sigs), self.bands, self.rows) * self._mix).sum(axis=2)
+
+    def filter(self, batch: MentionBatch) -> MentionBatch:
+        """The rows of `batch` whose message is not a near-duplicate of one seen in the window."""
+        groups: Dict[object, List[int]] = {}
+        for i, (x, t) in enumerate(zip(batch.ids, batch.texts)):
+            if t:
+                # Rows without an id are messages of their own
+                groups.setdefault(x if x is not None else object(), []).append(i)
+        msgs = []
+        for x, r in groups.items():
+            toks = words(batch.texts[r[0]], {ticker_name(batch.tickers[i]).lower() for i in r})
+            if len(toks) >= self.min_tokens:
+                msgs.append((x, r, features(toks)))
+        if not msgs:
+            return batch
+        sigs = self.signatures([f for _, _, f in msgs])
+        keys = self.band_keys(sigs).tolist()
+        drop: List[int] = []
+        with self._lock:
+            for (x, r, _), sig, k in zip(msgs, sigs, keys):
+                self.checked += 1
+                if self._seen(sig, k, max(batch.minutes[i] for i in r), (batch.source, x)):
+                    self.dropped += 1
+                    drop.extend(r)
+        if not drop:
+            return batch
+        gone = set(drop)
+        return batch.take(i for i in range(len(batch)) if i not in gone)
+
+    def _seen(self, sig: np.ndarray, keys: List[int], minute: int, owner: tuple) -> bool:
+        """Match `sig` against the index (refreshing the match) or add it; True on a match by another message."""
+        if minute > self._clock:
+            self._clock = minute
+            self._expire()
+        now = self._clock
+        cands: List[int] = []
+        for table, k in zip(self._tables, keys):
+            bucket = table.get(k)
+            if bucket:
+                cands += bucket     # an entry sharing several bands is compared more than once; cheaper than a set
+        if cands:
+            same = np.count_nonzero(self._mat[[self._slot[e] for e in cands]] == sig, axis=1)
+            best = int(same.argmax())
+            if same[best] >= self.threshold * len(sig):
+                e = cands[best]
+                if self._last[e] != now:
+                    self._last[e] = now
+                    self._order.append((now, e))
+                return self._owner[e] != owner
+        e = self._next
+        self._next += 1
+        for table, k in zip(self._tables, keys):
+            table.setdefault(k, []).append(e)
+        if not self._free:
+            old = len(self._mat)
+            self._mat = np.concatenate((self._mat, np.zeros((min(old, self.capacity + 1 - old), self._mat.shape[1]),
+                                                            dtype=np.uint64)))
+            self._free = list(range(len(self._mat) - 1, old - 1, -1))
+        slot = self._slot[e] = self._free.pop()
+        self._mat[slot] = sig
+        self._keys[e] = keys
+        self._last[e] = now
+        self._owner[e] = owner
+        self._order.append((now, e))
+        while len(self._slot) > self.capacity:
+            self._evict()
+        return False
+
+    def _expire(self):
+        cutoff = self._clock - self.window
+        while self._order and self._order[0][0] < cutoff:
+            self._evict()
+
+    def _evict(self):
+        minute, e = self._order.popleft()
+        # Refreshed entries have a newer record further on; only the last one removes them
+        if self._last.get(e) != minute:
+            return
+        for table, k in zip(self._tables, self._keys.pop(e)):
+            bucket = table[k]
+            bucket.remove(e)
+            if not bucket:
+                del table[k]
+        self._free.append(self._slot.pop(e))
+        del self._last[e], self._owner[e]
+
+    @property
+    def drop_rate(self) -> float:
+        return self.dropped / self.checked if self.checked else 0.0
+
+def from_config(cfg) -> Optional[NearDupIndex]:
+    """The configured filter, or None with NEARDUP_WINDOW_SEC=0 (the default)."""
+    window = getattr(cfg, "NEARDUP_WINDOW_SEC", 0)
+    if window <= 0:
+        return None
+    return NearDupIndex(window, getattr(cfg, "NEARDUP_THRESHOLD", 0.4), getattr(cfg, "NEARDUP_MIN_TOKENS", 6),
+                        getattr(cfg, "NEARDUP_CAPACITY", 200_000))
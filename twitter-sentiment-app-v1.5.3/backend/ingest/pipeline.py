@@ -0,0 +1,315 @@
+
+"""Producer/consumer ingestion pipeline.
+
+One producer thread per adapter fetches on its own schedule and pushes
+batches into a bounded queue; a single writer thread drains the queue and
+flushes by size or age. A slow adapter no longer delays the others, and a
+slow database only shows up as queue depth (and, once the queue is full, as
+producers blocking on put) instead of stalling every fetch.
+"""
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from ..adapters.base import Adapter
+from ..adapters.batch import MentionBatch, as_batch
+from . import metrics
+from .scheduler import PollScheduler
+from .state import WATERMARK
+
+@dataclass
+class Batch:
+    adapter: Adapter
+    items: MentionBatch
+    state: Dict[str, str]           # adapter checkpoint taken right after the fetch
+    fetched_at: float = field(default_factory=time.monotonic)
+    round: Optional[int] = None     # fetch round it came from; the round ends once the batch is flushed
+
+@dataclass
+class PipelineStats:
+    batches_in: int = 0
+    items_in: int = 0
+    flushes: int = 0
+    items_flushed: int = 0
+    flush_errors: int = 0
+    queue_depth: int = 0
+    queue_max_depth: int = 0
+    put_blocked_sec: float = 0.0    # total time producers waited on a full queue
+
+def fetch(loop: Optional[asyncio.AbstractEventLoop], a: Adapter, since: datetime, tickers: List[str]) -> MentionBatch:
+    # Prefer the concurrent path when the adapter has one
+    if loop is not None and hasattr(a, "afetch_since"):
+        return as_batch(loop.run_until_complete(a.afetch_since(since, tickers)), a.source_name)
+    return as_batch(a.fetch_since(since, tickers), a.source_name)
+
+class Pipeline:
+    """Run `adapters` against `tickers` and hand batches to `flush(batches)`.
+
+    `flush` runs on the writer thread and must persist the items and their
+    states (it raises on failure; the batches are retried with backoff).
+    Adapter clients are opened and closed on the producer thread that uses
+    them, so async clients stay on a single event loop. `stop()` also cuts
+    fetch rounds short: adapters see the stop event between tickers and the
+    partial batch is queued and flushed like any other. With a `scorer`
+    (scoring/scorer.py) each fetched batch is labeled on its producer thread
+    before it is queued; with a `neardup` index (neardup.py) near-duplicate
+    spam is dropped before that.
+    """
+
+    def __init__(self, adapters: List[Adapter], tickers: List[str], flush: Callable[[List[Batch]], None],
+                 interval: float = 30.0, queue_max: int = 64, flush_rows: int = 5000, flush_age: float = 5.0,
+                 since: Optional[datetime] = None, schedulers: Optional[Dict[str, PollScheduler]] = None,
+                 watermarks: Optional[Dict[str, datetime]] = None, scorer=None, neardup=None):
+        self.adapters = adapters
+        # source_name -> scheduler; those adapters poll only the tickers that are due
+        self.schedulers = schedulers or {}
+        self.tickers = tickers
+        self._tickers_by_source: Dict[str, List[str]] = {}
+        self.flush = flush
+        self.scorer = scorer
+        self.neardup = neardup
+        self.interval = interval
+        self.flush_rows = flush_rows
+        self.flush_age = flush_age
+        self.since = since or (datetime.utcnow() - timedelta(minutes=10))
+        # source_name -> persisted watermark to resume from; `since` only covers sources without one
+        self._since: Dict[str, datetime] = dict(watermarks or {})
+        self.queue: "queue.Queue[Batch]" = queue.Queue(maxsize=max(1, queue_max))
+        self.stats = PipelineStats()
+        self._stop = threading.Event()
+        self._producers: List[threading.Thread] = []
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._round_ids = itertools.count()
+        self._rounds: Dict[int, float] = {}     # open fetch round -> monotonic start
+
+    # --- lifecycle -----------------------------------------------------
+
+    def start(self):
+        for a in self.adapters:
+            t = threading.Thread(target=self._produce, args=(a,), name=f"fetch-{a.source_name}", daemon=True)
+            t.start()
+            self._producers.append(t)
+        self._writer = threading.Thread(target=self._write, name="writer", daemon=True)
+        self._writer.start()
+        return self
+
+    def stop(self, timeout: float = 30.0) -> bool:
+        """Stop fetching, let the writer drain what is queued; False if it did not finish within `timeout`."""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for t in self._producers:
+            t.join(max(0.0, deadline - time.monotonic()))
+        if self._writer is not None:
+            self._writer.join(max(0.0, deadline - time.monotonic()))
+        return not self.alive()
+
+    def alive(self) -> bool:
+        return self._writer is not None and self._writer.is_alive()
+
+    def set_tickers(self, tickers: List[str], source: Optional[str] = None):
+        """Change what producers poll from their next round on (all adapters, or just `source`)."""
+        with self._lock:
+            if source is None:
+                self.tickers = list(tickers)
+                for sched in self.schedulers.values():
+                    sched.retain(tickers)
+            else:
+                self._tickers_by_source[source] = list(tickers)
+                if source in self.schedulers:
+                    self.schedulers[source].retain(tickers)
+
+    def set_watermark(self, source: str, since: datetime):
+        """Fetch `source` from `since` on (e.g. the watermark of a feed this worker just took over)."""
+        with self._lock:
+            self._since[source] = since
+
+    def _since_for(self, a: Adapter) -> datetime:
+        with self._lock:
+            return self._since.get(a.source_name, self.since)
+
+    def _tickers_for(self, a: Adapter) -> List[str]:
+        with self._lock:
+            return self._tickers_by_source.get(a.source_name, self.tickers)
+
+    def settled(self, since: float) -> bool:
+        """True once every fetch round started before `since` (monotonic) has ended and its batch is flushed.
+
+        After `set_tickers`, settled(time.monotonic()) tells when nothing fetched
+        for the removed tickers is still in flight.
+        """
+        with self._lock:
+            return all(t >= since for t in self._rounds.values())
+
+    def _open_round(self, started: float) -> int:
+        with self._lock:
+            rid = next(self._round_ids)
+            self._rounds[rid] = started
+            return rid
+
+    def _close_rounds(self, rids):
+        with self._lock:
+            for rid in rids:
+                self._rounds.pop(rid, None)
+
+    # --- producers -----------------------------------------------------
+
+    def _produce(self, a: Adapter):
+        loop = asyncio.new_event_loop() if hasattr(a, "afetch_since") else None
+        sched = self.schedulers.get(a.source_name)
+        a.stop_event = self._stop
+        a.open()
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                fetch_start = datetime.utcnow()
+                since = self._since_for(a)
+                tickers = self._tickers_for(a)
+                if sched is not None:
+                    tickers = sched.due()
+                    if not tickers:
+                        self._stop.wait(min(self.interval, max(0.1, sched.next_due_in())))
+                        continue
+                elif not tickers:
+                    self._stop.wait(self.interval)  # nothing assigned to this worker (sharded mode)
+                    continue
+                rid = self._open_round(started)
+                t0 = time.perf_counter()
+                try:
+                    items = fetch(loop, a, since, tickers)
+                except Exception as e:
+                    print(f"[pipeline] {a.source_name}: fetch failed: {e!r}")
+                    metrics.FETCH_ERRORS.inc(source=a.source_name)
+                    items = None
+                self._record(a, time.perf_counter() - t0, items)
+                # Stopped mid-round: the batch may miss tickers, so the round does not move the watermark
+                cut = self._stop.is_set()
+                fetched = items
+                if items is not None and self.neardup is not None:
+                    items = self._dedup(a, items)
+                if items is not None and self.scorer is not None:
+                    self._score(a, items)
+                if items is not None:
+                    # Scheduled adapters keep their `since`: cursors make a per-round one unnecessary
+                    if sched is None and not cut:
+                        since = fetch_start
+                        self.set_watermark(a.source_name, since)
+                    # The watermark is committed with the batch, so a restart resumes exactly after it
+                    self._put(Batch(a, items, {**a.checkpoint(), WATERMARK: since.isoformat()}, round=rid))
+                else:
+                    self._close_rounds([rid])
+                if sched is not None and not cut:
+                    # The adapter's rate limiter paces the rounds
+                    sched.observe(tickers, fetched.ticker_counts() if fetched is not None else {})
+                    continue
+                self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+        finally:
+            if loop is not None:
+                loop.run_until_complete(a.aclose())
+                loop.close()
+            else:
+                a.close()
+
+    def _record(self, a: Adapter, seconds: float, items: Optional[MentionBatch]):
+        src = a.source_name
+        metrics.FETCH_SECONDS.observe(seconds, source=src)
+        if items is not None:
+            metrics.MESSAGES.inc(len(items), source=src)
+        for kind, n in a.take_stats().items():
+            metrics.ADAPTER_EVENTS.inc(n, source=src, kind=kind)
+
+    def _dedup(self, a: Adapter, items: MentionBatch) -> MentionBatch:
+        try:
+            kept = self.neardup.filter(items)
+        except Exception as e:
+            print(f"[pipeline] {a.source_name}: near-duplicate filter failed: {e!r}")
+            return items
+        if len(kept) < len(items):
+            metrics.DEDUPED.inc(len(items) - len(kept), source=a.source_name, stage="neardup")
+        return kept
+
+    def _score(self, a: Adapter, items: MentionBatch):
+        t0 = time.perf_counter()
+        try:
+            n = self.scorer.label_batch(items)
+        except Exception as e:
+            # Unscored mentions stay neutral; never drop the batch over it
+            print(f"[pipeline] {a.source_name}: scoring failed: {e!r}")
+            return
+        metrics.SCORE_SECONDS.observe(time.perf_counter() - t0, source=a.source_name)
+        metrics.SCORED.inc(n, source=a.source_name)
+        if getattr(self.scorer, "cache", None) is not None:
+            metrics.SCORE_CACHE_HIT_RATIO.set(self.scorer.cache.hit_rate)
+
+    def _put(self, b: Batch):
+        t0 = time.monotonic()
+        while True:
+            try:
+                self.queue.put(b, timeout=1.0)
+                break
+            except queue.Full:
+                if self._stop.is_set() and not self.alive():
+                    self._close_rounds([b.round])
+                    return
+        waited = time.monotonic() - t0
+        with self._lock:
+            s = self.stats
+            s.batches_in += 1
+            s.items_in += len(b.items)
+            s.put_blocked_sec += waited
+            s.queue_depth = self.queue.qsize()
+            s.queue_max_depth = max(s.queue_max_depth, s.queue_depth)
+        metrics.QUEUE_DEPTH.set(s.queue_depth)
+
+    # --- writer --------------------------------------------------------
+
+    def _write(self):
+        buf: List[Batch] = []
+        rows = 0
+        oldest = 0.0
+        backoff = 1.0
+        failed = False
+        while True:
+            if not failed:
+                producers_done = self._stop.is_set() and not any(t.is_alive() for t in self._producers)
+                try:
+                    b = self.queue.get(timeout=0.2)
+                    if not buf:
+                        oldest = b.fetched_at
+                    buf.append(b)
+                    rows += len(b.items)
+                    with self._lock:
+                        self.stats.queue_depth = self.queue.qsize()
+                    metrics.QUEUE_DEPTH.set(self.stats.queue_depth)
+                    if rows < self.flush_rows and time.monotonic() - oldest < self.flush_age:
+                        continue
+                except queue.Empty:
+                    if not buf:
+                        if producers_done:
+                            return
+                        continue
+                    if not producers_done and time.monotonic() - oldest < self.flush_age:
+                        continue
+            try:
+                self.flush(buf)
+            except Exception as e:
+                # Keep the buffer and stop pulling from the queue: producers see backpressure
+                failed = True
+                with self._lock:
+                    self.stats.flush_errors += 1
+                print(f"[pipeline] flush of {rows} items failed, retrying in {backoff:.0f}s: {e!r}")
+                time.sleep(backoff)
+                backoff = min(60.0, backoff * 2)
+                continue
+            failed = False
+            backoff = 1.0
+            with self._lock:
+                self.stats.flushes += 1
+                self.stats.items_flushed += rows
+            self._close_rounds(b.round for b in buf)
+            buf, rows = [], 0
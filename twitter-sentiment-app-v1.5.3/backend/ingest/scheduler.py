@@ -0,0 +1,117 @@
+
+"""Velocity-adaptive per-ticker polling.
+
+Keeps a min-heap of next-poll times. After each poll a ticker's message
+velocity (EWMA of new messages per second) sets its next interval so that
+about `target` new messages accumulate between polls - hot names are polled
+often, quiet ones back off geometrically up to `max_interval`. A full page
+means we may have missed messages, so that ticker is due again at once.
+The caller spends a fixed request budget on whatever is due first.
+"""
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+@dataclass
+class TickerStats:
+    velocity: float = 0.0       # new messages per second (EWMA)
+    interval: float = 0.0       # current poll interval
+    last_poll: float = 0.0
+    next_due: float = 0.0
+    polls: int = 0
+    full_pages: int = 0
+
+class PollScheduler:
+    def __init__(self, tickers: Iterable[str], min_interval: float = 30.0, max_interval: float = 3600.0,
+                 page_size: int = 30, target: Optional[float] = None, alpha: float = 0.3, batch: int = 30):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.page_size = page_size
+        self.target = target if target is not None else page_size / 2
+        self.alpha = alpha
+        self.batch = max(1, batch)  # tickers handed out per `due()` call (the request budget per round)
+        self.stats: Dict[str, TickerStats] = {}
+        self._heap: List[tuple] = []
+        self._lock = threading.Lock()
+        now = time.monotonic()
+        for t in tickers:
+            # Everything is due now; the budget spreads the first pass out
+            self.stats[t] = TickerStats(interval=min_interval, next_due=now)
+            self._heap.append((now, t))
+        heapq.heapify(self._heap)
+
+    def retain(self, tickers: Iterable[str], now: Optional[float] = None):
+        """Switch to a new ticker set: new tickers are due at once, dropped ones are forgotten."""
+        now = time.monotonic() if now is None else now
+        keep = set(tickers)
+        with self._lock:
+            for t in list(self.stats):
+                if t not in keep:
+                    del self.stats[t]   # its heap entries become stale
+            for t in keep:
+                if t not in self.stats:
+                    self.stats[t] = TickerStats(interval=self.min_interval, next_due=now)
+                    heapq.heappush(self._heap, (now, t))
+
+    def due(self, limit: Optional[int] = None, now: Optional[float] = None) -> List[str]:
+        """Pop up to `limit` (default `batch`) tickers whose poll time has come, most overdue first."""
+        now = time.monotonic() if now is None else now
+        limit = self.batch if limit is None else limit
+        out: List[str] = []
+        with self._lock:
+            while self._heap and len(out) < limit and self._heap[0][0] <= now:
+                due_at, t = heapq.heappop(self._heap)
+                st = self.stats.get(t)
+                if st is None or st.next_due != due_at:
+                    continue  # stale entry
+                out.append(t)
+        return out
+
+    def next_due_in(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return max(0.0, self._heap[0][0] - now) if self._heap else self.max_interval
+
+    def observe(self, polled: Iterable[str], counts: Dict[str, int], now: Optional[float] = None):
+        """Feed back how many new messages each polled ticker returned."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for t in polled:
+                st = self.stats.get(t)
+                if st is None:
+                    continue
+                n = counts.get(t, 0)
+                if st.last_poll:
+                    rate = n / max(1.0, now - st.last_poll)
+                    st.velocity = self.alpha * rate + (1 - self.alpha) * st.velocity
+                st.polls += 1
+                st.last_poll = now
+                if n >= self.page_size:
+                    st.full_pages += 1
+                    st.interval = self.min_interval
+                elif st.velocity > 0:
+                    st.interval = self.target / st.velocity
+                else:
+                    st.interval = st.interval * 2
+                st.interval = min(self.max_interval, max(self.min_interval, st.interval))
+                st.next_due = now if n >= self.page_size else now + st.interval
+                heapq.heappush(self._heap, (st.next_due, t))
+
+    def freshness(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Seconds since each ticker was last polled (inf if never)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return {t: (now - st.last_poll) if st.last_poll else float("inf") for t, st in self.stats.items()}
+
+    def summary(self, now: Optional[float] = None, top: int = 5) -> dict:
+        fr = self.freshness(now)
+        polled = sorted(v for v in fr.values() if v != float("inf"))
+        pct = lambda q: round(polled[min(len(polled) - 1, int(q * len(polled)))], 1) if polled else None
+        with self._lock:
+            hot = sorted(self.stats.items(), key=lambda kv: kv[1].velocity, reverse=True)[:top]
+            hot = {t: {"per_min": round(st.velocity * 60, 2), "interval": round(st.interval, 1), "staleness": round(fr[t], 1)}
+                   for t, st in hot}
+        return {"tickers": len(fr), "never_polled": len(fr) - len(polled),
+                "staleness_p50": pct(0.5), "staleness_p95": pct(0.95), "staleness_max": pct(1.0), "hot": hot}
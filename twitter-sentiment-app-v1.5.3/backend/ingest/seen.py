@@ -0,0 +1,65 @@
+
+"""Bounded in-process cache of (external id, ticker) pairs that are already stored.
+
+Drops re-fetched messages before they reach the database. It is an exact
+LRU set per source (no false positives, so nothing new is ever dropped);
+when a key falls out of the cache the DB-side dedup still catches it. A
+message naming several tickers is stored once per ticker, so the ticker is
+part of the key.
+"""
+from collections import OrderedDict
+from typing import Dict
+
+from ..adapters.batch import MentionBatch, as_batch
+
+class SeenCache:
+    def __init__(self, max_per_source: int = 100_000):
+        self.max_per_source = max(1, max_per_source)
+        self._ids: Dict[str, "OrderedDict[tuple, None]"] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _lru(self, source: str) -> "OrderedDict[tuple, None]":
+        lru = self._ids.get(source)
+        if lru is None:
+            lru = self._ids[source] = OrderedDict()
+        return lru
+
+    def filter(self, items) -> MentionBatch:
+        """Return the mentions whose (external_id, ticker) is not known yet."""
+        batch = as_batch(items)
+        lru = self._ids.get(batch.source)
+        if lru is None:
+            self.misses += len(batch)
+            return batch
+        keep = []
+        for i, (x, c) in enumerate(zip(batch.ids, batch.tickers)):
+            k = (x, c)   # interned ticker codes are stable for the life of the process
+            if x is not None and k in lru:
+                lru.move_to_end(k)
+                self.hits += 1
+            else:
+                keep.append(i)
+        self.misses += len(keep)
+        return batch.take(keep)
+
+    def add(self, items):
+        """Remember ids once their batch is committed."""
+        batch = as_batch(items)
+        lru = self._lru(batch.source)
+        for x, c in zip(batch.ids, batch.tickers):
+            if x is None:
+                continue
+            lru[(x, c)] = None
+            lru.move_to_end((x, c))
+        while len(lru) > self.max_per_source:
+            lru.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hit_rate, 4),
+                "size": {s: len(lru) for s, lru in self._ids.items()}}
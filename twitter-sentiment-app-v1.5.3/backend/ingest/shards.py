@@ -0,0 +1,147 @@
+
+"""Sharded collection: split the ticker universe across collector workers.
+
+Tickers hash into a fixed number of virtual shards. Live workers heartbeat
+into `collector_workers`, and each shard is assigned to one of them by
+rendezvous (highest-random-weight) hashing, so a worker joining or leaving
+only moves the shards it gains or loses. A worker polls a shard only while
+it holds the shard's row in `collector_leases`; leases are renewed every
+`ttl / 3` and taken over once expired, so a dead worker's shards are picked
+up within about one TTL.
+
+A shard that rendezvous moves to another worker is first dropped locally
+and its lease kept until the caller confirms that the fetch rounds that may
+still poll it have ended and their batches (and cursors) are flushed, so two
+workers never poll the same ticker and the new owner resumes from the last
+cursor. Lease times come from the worker clocks, which are assumed to be
+roughly in sync.
+"""
+import hashlib
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import select, update, delete, insert
+from sqlalchemy.exc import IntegrityError
+
+from ..db import CollectorWorker, CollectorLease
+
+def _h64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+
+def shard_of(ticker: str, shards: int) -> int:
+    return _h64(ticker.upper()) % shards
+
+def assign(shard: int, workers: Iterable[str]) -> Optional[str]:
+    """Rendezvous hashing: the worker with the highest weight for `shard`."""
+    return max(workers, key=lambda w: (_h64(f"{w}/{shard}"), w), default=None)
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+class ShardLeaser:
+    """Membership and shard leases for one worker.
+
+    Call `refresh(db, settled)` (and commit) every `renew_every` seconds; it
+    returns the shards this worker may poll right now. Once the pollers no
+    longer use the shards it dropped, call `handed_off(stamp)`; they are
+    released by the first refresh for which `settled(stamp)` is true.
+    `release(db)` gives everything up on shutdown so peers take over without
+    waiting for the TTL.
+    """
+
+    def __init__(self, worker_id: str, shards: int = 64, ttl: float = 30.0):
+        self.worker_id = worker_id
+        self.shards = shards
+        self.ttl = ttl
+        self.owned: Set[int] = set()
+        self.releasing: Dict[int, Optional[float]] = {}     # dropped shard -> hand-off stamp, still leased
+        self.members: List[str] = [worker_id]
+        self._valid_until: Optional[datetime] = None
+
+    @property
+    def renew_every(self) -> float:
+        return self.ttl / 3
+
+    def tickers(self, universe: Iterable[str]) -> List[str]:
+        return [t for t in universe if shard_of(t, self.shards) in self.owned]
+
+    def refresh(self, db, now: Optional[datetime] = None,
+                settled: Optional[Callable[[float], bool]] = None) -> Set[int]:
+        now = now or datetime.utcnow()
+        until = now + timedelta(seconds=self.ttl)
+        self._heartbeat(db, now, until)
+        w, ls = CollectorWorker.__table__, CollectorLease.__table__
+        self.members = sorted(db.execute(select(w.c.worker_id).where(w.c.expires_at > now)).scalars())
+        if self.worker_id not in self.members:
+            self.members.append(self.worker_id)
+        wanted = {s for s in range(self.shards) if assign(s, self.members) == self.worker_id}
+
+        for s in wanted & set(self.releasing):
+            del self.releasing[s]       # moved back before it was released: still ours
+        done = sorted(s for s, t in self.releasing.items() if t is not None and (settled is None or settled(t)))
+        if done:
+            db.execute(delete(ls).where(ls.c.owner == self.worker_id, ls.c.shard.in_(done)))
+            for s in done:
+                del self.releasing[s]
+        for s in self.owned - wanted:
+            self.releasing[s] = None
+
+        held = set(db.execute(select(ls.c.shard).where(ls.c.owner == self.worker_id)).scalars())
+        renew = sorted(held & (wanted | set(self.releasing)))
+        if renew:
+            db.execute(update(ls).where(ls.c.owner == self.worker_id, ls.c.shard.in_(renew)).values(expires_at=until))
+        got = held & wanted
+        for s in sorted(wanted - held):
+            if self._claim(db, s, now, until):
+                got.add(s)
+        self.owned = got
+        self._valid_until = until
+        return set(got)
+
+    def handed_off(self, stamp: float):
+        """The pollers stopped using the shards dropped so far; `stamp` is what `settled` is asked about."""
+        for s, t in self.releasing.items():
+            if t is None:
+                self.releasing[s] = stamp
+
+    def holds(self, shard: int) -> bool:
+        """Whether this worker still leases `shard` (polled, or dropped but not yet released)."""
+        return shard in self.owned or shard in self.releasing
+
+    def expire(self, now: Optional[datetime] = None) -> bool:
+        """After failed refreshes: drop every shard once our leases have run out. True if that happened."""
+        now = now or datetime.utcnow()
+        if (self.owned or self.releasing) and self._valid_until is not None and now >= self._valid_until:
+            self.owned, self.releasing = set(), {}
+            return True
+        return False
+
+    def release(self, db):
+        w, ls = CollectorWorker.__table__, CollectorLease.__table__
+        db.execute(delete(ls).where(ls.c.owner == self.worker_id))
+        db.execute(delete(w).where(w.c.worker_id == self.worker_id))
+        self.owned, self.releasing, self._valid_until = set(), {}, None
+
+    def _heartbeat(self, db, now: datetime, until: datetime):
+        w = CollectorWorker.__table__
+        db.execute(delete(w).where(w.c.expires_at < now - timedelta(seconds=10 * self.ttl)))  # long-dead members
+        if db.execute(update(w).where(w.c.worker_id == self.worker_id).values(expires_at=until)).rowcount == 0:
+            db.execute(insert(w).values(worker_id=self.worker_id, expires_at=until))
+
+    def _claim(self, db, shard: int, now: datetime, until: datetime) -> bool:
+        """Take `shard` if it is free or its lease expired; the row update is the arbiter."""
+        ls = CollectorLease.__table__
+        res = db.execute(update(ls).where(ls.c.shard == shard, ls.c.expires_at < now)
+                         .values(owner=self.worker_id, expires_at=until))
+        if res.rowcount:
+            return True
+        if db.execute(select(ls.c.shard).where(ls.c.shard == shard)).first() is not None:
+            return False  # held by a live peer; it releases once it sees us
+        try:
+            with db.begin_nested():
+                db.execute(insert(ls).values(shard=shard, owner=self.worker_id, expires_at=until))
+            return True
+        except IntegrityError:
+            return False  # a peer inserted it first
@@ -0,0 +1,200 @@
+
+"""Durable local spool between fetching and the database.
+
+The writer appends each flush to an append-only segment file (one JSON line
+per batch, one fsync per append) and returns immediately; a replayer thread
+drains sealed segments into the database in large transactions and deletes a
+segment only after its transaction committed. If the DB is slow or down,
+fetching continues until `max_bytes` of spool is used (then appends raise
+SpoolFull and the pipeline's backpressure kicks in).
+
+Replay is at-least-once: a crash between commit and delete replays the
+segment again, which the id-based dedup in the write path absorbs. A torn
+last line from a crash mid-append is skipped.
+"""
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..adapters.batch import MentionBatch, as_batch
+
+class SpoolFull(Exception):
+    pass
+
+def encode(source: str, items, state: Dict[str, str]) -> dict:
+    batch = as_batch(items, source)
+    return {"source": source, "state": state, "n": len(batch), "batch": batch.to_json()}
+
+def decode(rec: dict) -> Tuple[str, MentionBatch, Dict[str, str]]:
+    source = rec["source"]
+    return source, MentionBatch.from_json(source, rec["batch"]), rec.get("state") or {}
+
+class Spool:
+    def __init__(self, path: str, segment_bytes: int = 16 << 20, max_bytes: int = 1 << 30):
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        segs = self._list()
+        self._seq = (segs[-1][0] + 1) if segs else 1
+        self._sealed = [p for _, p in segs]   # leftovers from a previous run are replayed first
+        self._active: Optional[str] = None
+        self._fh = None
+        self._active_since = 0.0
+        self._bytes = sum(os.path.getsize(p) for p in self._sealed)
+
+    def _list(self) -> List[Tuple[int, str]]:
+        out = []
+        for name in os.listdir(self.path):
+            if name.startswith("seg-") and name.endswith(".jsonl"):
+                try:
+                    out.append((int(name[4:-6]), os.path.join(self.path, name)))
+                except ValueError:
+                    continue
+        return sorted(out)
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def pending_segments(self) -> int:
+        with self._lock:
+            return len(self._sealed) + (1 if self._active else 0)
+
+    def append(self, records: List[dict]):
+        """Append records durably (single write + fsync)."""
+        data = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records).encode("utf-8")
+        with self._lock:
+            if self._bytes + len(data) > self.max_bytes:
+                raise SpoolFull(f"spool at {self._bytes} bytes (limit {self.max_bytes})")
+            if self._fh is None:
+                self._active = os.path.join(self.path, f"seg-{self._seq:012d}.jsonl")
+                self._seq += 1
+                self._fh = open(self._active, "ab")
+                self._active_since = time.monotonic()
+            self._fh.write(data)
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._bytes += len(data)
+            if self._fh.tell() >= self.segment_bytes:
+                self._seal_locked()
+
+    def _seal_locked(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._sealed.append(self._active)
+            self._fh, self._active = None, None
+
+    def seal_if_older(self, age: float):
+        with self._lock:
+            if self._fh is not None and time.monotonic() - self._active_since >= age:
+                self._seal_locked()
+
+    def close(self):
+        with self._lock:
+            self._seal_locked()
+
+    @staticmethod
+    def read(path: str) -> Iterator[dict]:
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # torn write at the tail
+
+    def pending_states(self) -> Dict[str, Dict[str, str]]:
+        """Latest adapter state per source among records not yet replayed (newer than what the DB holds)."""
+        with self._lock:
+            paths = list(self._sealed) + ([self._active] if self._active else [])
+        out: Dict[str, Dict[str, str]] = {}
+        for p in paths:
+            for rec in self.read(p):
+                out.setdefault(rec["source"], {}).update(rec.get("state") or {})
+        return out
+
+    def take(self, max_bytes: int) -> List[str]:
+        """Sealed segments to replay next, oldest first, up to about `max_bytes` (at least one)."""
+        out, total = [], 0
+        with self._lock:
+            for p in self._sealed:
+                size = os.path.getsize(p) if os.path.exists(p) else 0
+                if out and total + size > max_bytes:
+                    break
+                out.append(p)
+                total += size
+        return out
+
+    def done(self, paths: List[str]):
+        with self._lock:
+            for p in paths:
+                try:
+                    size = os.path.getsize(p)
+                    os.remove(p)
+                    self._bytes = max(0, self._bytes - size)
+                except OSError:
+                    pass
+                if p in self._sealed:
+                    self._sealed.remove(p)
+
+class Replayer:
+    """Drain a Spool into the database with `write(records)` (one transaction per call)."""
+
+    def __init__(self, spool: Spool, write: Callable[[List[dict]], None], seal_age: float = 5.0,
+                 max_bytes: int = 32 << 20):
+        self.spool = spool
+        self.write = write
+        self.seal_age = seal_age
+        self.max_bytes = max_bytes  # spool bytes per replay transaction
+        self.replayed_items = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="spool-replay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 30.0):
+        """Seal the active segment and make a last attempt to drain everything."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.spool.close()
+        try:
+            while self.drain_once():
+                pass
+        except Exception as e:
+            print(f"[spool] final drain failed, {self.spool.pending_segments()} segments left on disk: {e!r}")
+
+    def drain_once(self) -> bool:
+        """Replay one group of sealed segments; False when nothing was pending."""
+        paths = self.spool.take(self.max_bytes)
+        if not paths:
+            return False
+        records = [r for p in paths for r in Spool.read(p)]
+        self.write(records)
+        self.spool.done(paths)
+        self.replayed_items += sum(r["n"] for r in records)
+        return True
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            self.spool.seal_if_older(self.seal_age)
+            try:
+                busy = self.drain_once()
+                backoff = 1.0
+            except Exception as e:
+                self.errors += 1
+                print(f"[spool] replay failed ({self.spool.pending_segments()} segments, {self.spool.bytes_used} bytes pending), "
+                      f"retrying in {backoff:.0f}s: {e!r}")
+                self._stop.wait(backoff)
+                backoff = min(60.0, backoff * 2)
+                continue
+            if not busy:
+                self._stop.wait(min(1.0, self.seal_age))
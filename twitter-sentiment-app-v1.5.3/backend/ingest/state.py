@@ -0,0 +1,54 @@
+
+"""Persisted adapter state (cursors / checkpoints) in adapter_state.
+
+save_state runs in the caller's transaction, so state written together with
+the batch it describes is committed atomically with it.
+
+Besides the adapter's own keys, the pipeline stores a per-source watermark
+under WATERMARK: the `since` of the adapter's next fetch round, i.e. every
+mention older than it has been fetched and committed. Restarts resume from
+it instead of a fixed look-back window.
+"""
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from sqlalchemy import select, update, insert, func
+
+from ..db import AdapterState
+
+try:
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+except Exception:
+    pg_insert = None
+
+WATERMARK = "_watermark"
+
+def split_watermark(state: Dict[str, str]) -> Tuple[Dict[str, str], Optional[datetime]]:
+    """(adapter keys, watermark as naive UTC or None)."""
+    rest = {k: v for k, v in state.items() if k != WATERMARK}
+    raw = state.get(WATERMARK)
+    try:
+        return rest, datetime.fromisoformat(raw) if raw else None
+    except ValueError:
+        return rest, None
+
+def load_state(db, source: str) -> Dict[str, str]:
+    t = AdapterState.__table__
+    return {k: v for k, v in db.execute(select(t.c.key, t.c.value).where(t.c.source == source)).all()}
+
+def save_state(db, source: str, state: Dict[str, str]):
+    if not state:
+        return
+    t = AdapterState.__table__
+    rows = [{"source": source, "key": k, "value": str(v)} for k, v in state.items()]
+    if pg_insert is not None and db.get_bind().dialect.name == "postgresql":
+        stmt = pg_insert(t).values(rows)
+        stmt = stmt.on_conflict_do_update(index_elements=["source", "key"],
+                                          set_={"value": stmt.excluded.value, "updated_at": func.now()})
+        db.execute(stmt)
+        return
+    have = set(db.execute(select(t.c.key).where(t.c.source == source, t.c.key.in_(list(state)))).scalars())
+    for r in rows:
+        if r["key"] in have:
+            db.execute(update(t).where(t.c.source == source, t.c.key == r["key"]).values(value=r["value"], updated_at=func.now()))
+        else:
+            db.execute(insert(t).values(**r))
@@ -0,0 +1,199 @@
+
+"""Set-based write path for mention_minutes.
+
+One statement per chunk instead of one SELECT + ORM add per message.
+"""
+from dataclasses import dataclass
+from typing import Iterable, List, Dict, Any
+from sqlalchemy import select, insert, update, bindparam, tuple_
+
+from ..db import MentionMinute, MentionId
+from ..adapters.batch import MentionBatch, SENTIMENTS, as_batch, ticker_name, minute_dt
+from .aggregate import aggregate_batch, bucket_rows
+
+try:
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+except Exception:
+    pg_insert = None
+
+# 10 bound columns per row; keeps each statement well under the 65535 parameter limit
+CHUNK = 2000
+
+@dataclass
+class WriteResult:
+    inserted: int = 0   # mentions newly counted
+    deduped: int = 0    # mentions dropped as already stored
+    buckets: int = 0    # mention_minutes rows inserted or incremented (aggregated mode)
+
+    def __iadd__(self, other: "WriteResult"):
+        self.inserted += other.inserted
+        self.deduped += other.deduped
+        self.buckets += other.buckets
+        return self
+
+def _chunks(items: List[Any], size: int = CHUNK) -> Iterable[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i+size]
+
+def _is_postgres(db) -> bool:
+    return pg_insert is not None and db.get_bind().dialect.name == "postgresql"
+
+def mention_rows(batch: MentionBatch, idx: Iterable[int]) -> List[Dict[str, Any]]:
+    """One mention_minutes row per selected batch row (the minute datetime is built once per minute)."""
+    minutes: Dict[int, Any] = {}
+    rows = []
+    for i in idx:
+        m = batch.minutes[i]
+        ts = minutes.get(m)
+        if ts is None:
+            ts = minutes[m] = minute_dt(m)
+        s = SENTIMENTS[batch.sentiments[i]]
+        p = batch.scores[i]
+        rows.append({"ticker": ticker_name(batch.tickers[i]), "ts": ts, "mentions": 1,
+                     "pos": 1 if s == "pos" else 0, "neg": 1 if s == "neg" else 0, "neu": 1 if s == "neu" else 0,
+                     "sentiment_sum": p, "sentiment_sq_sum": p * p,
+                     "source": batch.source, "external_id": batch.ids[i]})
+    return rows
+
+def _existing_ids(db, rows: List[Dict[str, Any]]) -> set:
+    by_source: Dict[str, list] = {}
+    for r in rows:
+        if r["external_id"] is not None:
+            by_source.setdefault(r["source"], []).append((r["external_id"], r["ticker"]))
+    found = set()
+    t = MentionMinute.__table__
+    for source, keys in by_source.items():
+        for chunk in _chunks(keys):
+            q = select(t.c.external_id, t.c.ticker).where(t.c.source == source,
+                                                          tuple_(t.c.external_id, t.c.ticker).in_(chunk))
+            found.update((source, x, tk) for x, tk in db.execute(q).all())
+    return found
+
+def bulk_insert_mentions(db, items) -> WriteResult:
+    """Insert one row per mention, skipping (source, external_id, ticker) keys already stored.
+
+    A message naming several tickers has one row per ticker under the same
+    external_id, and each of them counts.
+
+    Postgres: multi-row INSERT ... ON CONFLICT ON CONSTRAINT uq_mm_source_external_ticker DO NOTHING.
+    Other engines: one IN-list lookup per chunk, then an executemany of the new rows.
+    Does not commit; the caller owns the transaction.
+    """
+    batch = as_batch(items)
+    total = len(batch)
+    seen = set()
+    idx = []
+    for i, (x, c) in enumerate(zip(batch.ids, batch.tickers)):
+        if x is not None:
+            if (x, c) in seen:
+                continue
+            seen.add((x, c))
+        idx.append(i)
+    rows = mention_rows(batch, idx)
+    if not rows:
+        return WriteResult(0, total)
+
+    t = MentionMinute.__table__
+    inserted = 0
+    if _is_postgres(db):
+        for chunk in _chunks(rows):
+            stmt = pg_insert(t).values(chunk).on_conflict_do_nothing(constraint="uq_mm_source_external_ticker").returning(t.c.id)
+            inserted += len(db.execute(stmt).all())
+    else:
+        existing = _existing_ids(db, rows)
+        new = [r for r in rows if r["external_id"] is None
+               or (r["source"], r["external_id"], r["ticker"]) not in existing]
+        for chunk in _chunks(new):
+            db.execute(insert(t), chunk)
+        inserted = len(new)
+    return WriteResult(inserted, total - inserted)
+
+def claim_ids(db, items) -> MentionBatch:
+    """Record (external id, ticker) keys in mention_ids and return only the mentions not seen before.
+
+    A message naming several tickers is claimed once per ticker. Mentions
+    without an external_id cannot be deduplicated and are always returned.
+    """
+    batch = as_batch(items)
+    keep: List[int] = []
+    pending: Dict[tuple, int] = {}
+    for i, (x, c) in enumerate(zip(batch.ids, batch.tickers)):
+        if x is None:
+            keep.append(i)
+        elif (x, c) not in pending:
+            pending[(x, c)] = i
+    if not pending:
+        return batch.take(keep)
+
+    t = MentionId.__table__
+    source = batch.source
+    rows = [{"source": source, "external_id": x, "ticker": ticker_name(c), "ts": minute_dt(batch.minutes[i])}
+            for (x, c), i in pending.items()]
+    if _is_postgres(db):
+        claimed = set()
+        for chunk in _chunks(rows):
+            stmt = pg_insert(t).values(chunk).on_conflict_do_nothing().returning(t.c.external_id, t.c.ticker)
+            claimed.update(tuple(r) for r in db.execute(stmt).all())
+    else:
+        existing = set()
+        for chunk in _chunks([(r["external_id"], r["ticker"]) for r in rows]):
+            q = select(t.c.external_id, t.c.ticker).where(t.c.source == source,
+                                                          tuple_(t.c.external_id, t.c.ticker).in_(chunk))
+            existing.update(tuple(r) for r in db.execute(q).all())
+        new = [r for r in rows if (r["external_id"], r["ticker"]) not in existing]
+        for chunk in _chunks(new):
+            db.execute(insert(t), chunk)
+        claimed = {(r["external_id"], r["ticker"]) for r in new}
+    keep.extend(i for (x, c), i in pending.items() if (x, ticker_name(c)) in claimed)
+    keep.sort()
+    return batch.take(keep)
+
+def upsert_buckets(db, rows: List[Dict[str, Any]]) -> int:
+    """Add bucket counters onto existing mention_minutes rows, inserting missing ones."""
+    if not rows:
+        return 0
+    t = MentionMinute.__table__
+    if _is_postgres(db):
+        for chunk in _chunks(rows):
+            stmt = pg_insert(t).values(chunk)
+            ex = stmt.excluded
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_mm_source_external_ticker",
+                set_={"mentions": t.c.mentions + ex.mentions, "pos": t.c.pos + ex.pos,
+                      "neg": t.c.neg + ex.neg, "neu": t.c.neu + ex.neu,
+                      "sentiment_sum": t.c.sentiment_sum + ex.sentiment_sum,
+                      "sentiment_sq_sum": t.c.sentiment_sq_sum + ex.sentiment_sq_sum},
+            )
+            db.execute(stmt)
+        return len(rows)
+
+    existing: Dict[tuple, int] = {}
+    for chunk in _chunks(rows):
+        q = select(t.c.id, t.c.source, t.c.external_id).where(
+            tuple_(t.c.source, t.c.external_id).in_([(r["source"], r["external_id"]) for r in chunk]))
+        existing.update(((s, x), i) for i, s, x in db.execute(q).all())
+    bumps = [{"_id": existing[(r["source"], r["external_id"])], "_m": r["mentions"], "_p": r["pos"], "_n": r["neg"], "_u": r["neu"],
+              "_s": r["sentiment_sum"], "_q": r["sentiment_sq_sum"]}
+             for r in rows if (r["source"], r["external_id"]) in existing]
+    new = [r for r in rows if (r["source"], r["external_id"]) not in existing]
+    if bumps:
+        stmt = (update(t).where(t.c.id == bindparam("_id"))
+                .values(mentions=t.c.mentions + bindparam("_m"), pos=t.c.pos + bindparam("_p"),
+                        neg=t.c.neg + bindparam("_n"), neu=t.c.neu + bindparam("_u"),
+                        sentiment_sum=t.c.sentiment_sum + bindparam("_s"),
+                        sentiment_sq_sum=t.c.sentiment_sq_sum + bindparam("_q")))
+        db.connection().execute(stmt, bumps)
+    for chunk in _chunks(new):
+        db.execute(insert(t), chunk)
+    return len(rows)
+
+def write_aggregated(db, items) -> WriteResult:
+    """Dedup via mention_ids, fold the survivors into minute buckets and upsert them.
+
+    Both steps run in the caller's transaction, so an id is claimed if and only
+    if its mention was counted. Does not commit.
+    """
+    batch = as_batch(items)
+    fresh = claim_ids(db, batch)
+    buckets = upsert_buckets(db, bucket_rows(aggregate_batch(fresh)))
+    return WriteResult(len(fresh), len(batch) - len(fresh), buckets)
@@ -36,9 +36,14 @@ def recompute_rollup(day_str: str):
     end = start + timedelta(days=1)
     with SessionLocal() as db:
         db.execute(delete(DailyRollup).where(DailyRollup.day==start))
-        rows = db.execute(select(MentionMinute.ticker, func.sum(MentionMinute.mentions), func.sum(MentionMinute.pos), func.sum(MentionMinute.neg), func.sum(MentionMinute.neu)).where(MentionMinute.ts>=start, MentionMinute.ts<end).group_by(MentionMinute.ticker)).all()
-        for t, m, p, n, u in rows:
-            db.add(DailyRollup(ticker=t, day=start, mentions=int(m or 0), pos=int(p or 0), neg=int(n or 0), neu=int(u or 0), interest=float(m or 0), zscore=0.0))
+        rows = db.execute(select(MentionMinute.ticker, func.sum(MentionMinute.mentions), func.sum(MentionMinute.pos), func.sum(MentionMinute.neg), func.sum(MentionMinute.neu),
+                                 func.sum(MentionMinute.sentiment_sum), func.sum(MentionMinute.sentiment_sq_sum)).where(MentionMinute.ts>=start, MentionMinute.ts<end).group_by(MentionMinute.ticker)).all()
+        for t, m, p, n, u, s, q in rows:
+            m, s, q = int(m or 0), float(s or 0.0), float(q or 0.0)
+            mean = s / m if m else 0.0
+            var = max(0.0, q / m - mean * mean) if m else 0.0
+            db.add(DailyRollup(ticker=t, day=start, mentions=m, pos=int(p or 0), neg=int(n or 0), neu=int(u or 0),
+                               sentiment_sum=s, sentiment_sq_sum=q, sentiment_mean=mean, sentiment_var=var, interest=float(m), zscore=0.0))
         db.commit()
 
 if __name__ == "__main__":
@@ -29,3 +29,5 @@ class DailyItem(BaseModel):
     pos: int
     neg: int
     neu: int
+    sentiment_mean: float = 0.0
+    sentiment_var: float = 0.0
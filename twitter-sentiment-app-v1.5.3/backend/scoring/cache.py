@@ -0,0 +1,115 @@
+
+"""Content-hash cache of sentiment scores.
+
+Crossposts, retweets, bot spam and reposted titles repeat the same text, so
+scores are cached by a 64-bit blake2b hash of the normalized text (lowercase,
+curly apostrophes straightened, whitespace collapsed: the scorer sees these
+as the same tokens). The in-memory tier is an LRU of `capacity` entries; with
+`path` set, scores are also written through to a SQLite file that survives
+restarts and is consulted on memory misses.
+
+A cache belongs to one lexicon: the file records the scorer's fingerprint and
+is cleared when it changes, so edited weights never serve stale scores.
+"""
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().replace("’", "'").split())
+
+def normalized_key(norm: str) -> int:
+    """Cache key of an already normalized text (a signed 64-bit int, SQLite's INTEGER)."""
+    return int.from_bytes(hashlib.blake2b(norm.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+def text_key(text: str) -> int:
+    return normalized_key(normalize(text))
+
+class ScoreCache:
+    def __init__(self, capacity: int = 100_000, path: Optional[str] = None, fingerprint: str = ""):
+        self.capacity = max(1, capacity)
+        self._lru: "OrderedDict[int, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS scores (k INTEGER PRIMARY KEY, s REAL NOT NULL)")
+            row = self._db.execute("SELECT v FROM meta WHERE k = 'fingerprint'").fetchone()
+            if row is None or row[0] != fingerprint:
+                self._db.execute("DELETE FROM scores")
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+
+    def get_many(self, keys: Sequence[int]) -> Dict[int, float]:
+        """Cached scores for the keys that have one."""
+        out: Dict[int, float] = {}
+        missing: List[int] = []
+        with self._lock:
+            lru = self._lru
+            for k in keys:
+                s = lru.get(k)
+                if s is None:
+                    missing.append(k)
+                else:
+                    lru.move_to_end(k)
+                    out[k] = s
+            self.hits += len(out)
+            if missing and self._db is not None:
+                found = self._read(missing)
+                self.disk_hits += len(found)
+                self.hits += len(found)
+                self._remember(found)
+                out.update(found)
+            self.misses += len(keys) - len(out)
+        return out
+
+    def repeats(self, n: int):
+        """Count lookups answered by an identical text earlier in the same batch as hits."""
+        with self._lock:
+            self.hits += n
+
+    def put_many(self, scores: Dict[int, float]):
+        with self._lock:
+            self._remember(scores)
+            if self._db is not None and scores:
+                self._db.execute("BEGIN")
+                self._db.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?)", scores.items())
+                self._db.execute("COMMIT")
+
+    def _read(self, keys: List[int]) -> Dict[int, float]:
+        out: Dict[int, float] = {}
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            q = f"SELECT k, s FROM scores WHERE k IN ({','.join('?' * len(part))})"
+            out.update(self._db.execute(q, part).fetchall())
+        return out
+
+    def _remember(self, scores: Dict[int, float]):
+        lru = self._lru
+        for k, s in scores.items():
+            lru[k] = s
+            lru.move_to_end(k)
+        while len(lru) > self.capacity:
+            lru.popitem(last=False)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "hit_rate": round(self.hit_rate, 4), "size": len(self._lru)}
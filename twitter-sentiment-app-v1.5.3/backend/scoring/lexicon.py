@@ -0,0 +1,74 @@
+
+"""Built-in finance / trading-slang lexicon.
+
+Weights are on a -3..+3 scale (roughly: 1 = mild, 2 = clear, 3 = strong).
+Words are lowercase single tokens as produced by the scorer's tokenizer;
+emoji are tokens of their own. Extend or override it with SCORER_LEXICON
+(a `token<TAB>weight` file) instead of editing this table.
+"""
+from typing import Dict, FrozenSet
+
+WEIGHTS: Dict[str, float] = {
+    # direction / price action
+    "bull": 2.0, "bullish": 2.5, "bulls": 1.5, "long": 1.0, "calls": 1.0,
+    "bear": -2.0, "bearish": -2.5, "bears": -1.5, "short": -1.0, "shorts": -1.0, "puts": -1.0,
+    "buy": 1.5, "buying": 1.5, "bought": 1.0, "accumulate": 1.5, "accumulating": 1.5, "adding": 1.0, "add": 0.5,
+    "sell": -1.5, "selling": -1.5, "sold": -1.0, "dump": -2.0, "dumping": -2.5, "dumped": -2.0,
+    "rally": 2.0, "rallying": 2.0, "breakout": 2.0, "rip": 1.5, "ripping": 2.0, "soar": 2.5, "soaring": 2.5,
+    "surge": 2.0, "surging": 2.0, "jump": 1.5, "jumps": 1.5, "pop": 1.5, "popping": 1.5, "climb": 1.0,
+    "gain": 1.5, "gains": 1.5, "green": 1.5, "up": 0.5, "higher": 1.0, "high": 0.5, "uptrend": 2.0,
+    "rebound": 1.5, "recover": 1.5, "recovery": 1.5, "bounce": 1.0, "squeeze": 1.5, "moon": 2.5,
+    "mooning": 3.0, "rocket": 2.5, "tendies": 2.0, "lambo": 2.0, "printing": 2.0,
+    "crash": -3.0, "crashing": -3.0, "crashed": -2.5, "plunge": -2.5, "plunging": -2.5, "tank": -2.5,
+    "tanking": -2.5, "tanked": -2.5, "drop": -1.5, "dropping": -1.5, "dropped": -1.5, "fall": -1.5,
+    "falling": -1.5, "fell": -1.5, "slide": -1.5, "sink": -2.0, "sinking": -2.0, "selloff": -2.5,
+    "red": -1.5, "down": -0.5, "lower": -1.0, "low": -0.5, "downtrend": -2.0, "breakdown": -2.0,
+    "rug": -2.5, "rugpull": -3.0, "bagholder": -2.0, "bagholders": -2.0, "bags": -1.0, "rekt": -2.5,
+    "wrecked": -2.5, "bleeding": -2.0, "bleed": -2.0, "drilling": -2.0, "dip": -0.5,
+    # fundamentals / news
+    "beat": 2.0, "beats": 2.0, "exceeded": 2.0, "outperform": 2.0, "outperformed": 2.0, "upgrade": 2.0,
+    "upgraded": 2.0, "raised": 1.0, "raise": 1.0, "record": 1.0, "profit": 1.5, "profitable": 2.0,
+    "profits": 1.5, "growth": 1.5, "growing": 1.0, "strong": 1.5, "stronger": 1.5, "strength": 1.5,
+    "solid": 1.5, "positive": 1.5, "optimistic": 2.0, "undervalued": 2.0, "cheap": 0.5, "bargain": 1.5,
+    "dividend": 0.5, "buyback": 1.5, "approval": 2.0, "approved": 2.0, "partnership": 1.0, "win": 1.5,
+    "winning": 1.5, "winner": 1.5, "opportunity": 1.5, "confident": 1.5, "momentum": 1.0, "upside": 2.0,
+    "miss": -2.0, "missed": -2.0, "misses": -2.0, "underperform": -2.0, "downgrade": -2.0,
+    "downgraded": -2.0, "cut": -1.5, "cuts": -1.5, "slashed": -2.0, "loss": -1.5, "losses": -1.5,
+    "losing": -1.5, "lost": -1.5, "debt": -1.0, "weak": -1.5, "weaker": -1.5, "weakness": -1.5,
+    "negative": -1.5, "pessimistic": -2.0, "overvalued": -2.0, "expensive": -1.0, "bubble": -2.0,
+    "bankrupt": -3.0, "bankruptcy": -3.0, "default": -2.0, "dilution": -2.0, "dilute": -2.0,
+    "offering": -1.0, "lawsuit": -2.0, "fraud": -3.0, "scam": -3.0, "investigation": -2.0,
+    "recall": -1.5, "layoffs": -1.5, "delisted": -3.0, "delisting": -3.0, "halted": -1.5,
+    "warning": -1.5, "risk": -1.0, "risky": -1.5, "fear": -1.5, "panic": -2.5, "recession": -2.0,
+    "downside": -2.0, "overbought": -1.0, "oversold": 1.0,
+    # general tone
+    "good": 1.5, "great": 2.0, "awesome": 2.5, "amazing": 2.5, "excellent": 2.5, "love": 2.0,
+    "nice": 1.5, "happy": 1.5, "huge": 1.0, "best": 2.0, "better": 1.0, "easy": 0.5, "safe": 1.0,
+    "bad": -1.5, "terrible": -2.5, "awful": -2.5, "horrible": -2.5, "hate": -2.0, "worst": -2.5,
+    "worse": -1.5, "ugly": -2.0, "sad": -1.5, "scary": -2.0, "trash": -2.0, "garbage": -2.0,
+    "dead": -2.0, "doomed": -2.5, "disaster": -2.5, "worthless": -3.0, "overpriced": -2.0,
+    # emoji
+    "\U0001F680": 2.5,   # rocket
+    "\U0001F4C8": 1.5,   # chart increasing
+    "\U0001F4C9": -1.5,  # chart decreasing
+    "\U0001F402": 1.5,   # ox (bull)
+    "\U0001F43B": -1.5,  # bear
+    "\U0001F48E": 1.0,   # gem (diamond hands)
+    "\U0001F525": 1.0,   # fire
+    "\U0001F911": 1.5,   # money-mouth face
+    "\U0001F4B0": 1.0,   # money bag
+    "\U0001F315": 1.5,   # full moon
+    "\U0001F4A9": -2.0,  # pile of poo
+    "\U0001F921": -1.5,  # clown
+    "\U0001F480": -1.5,  # skull
+    "\U0001F62D": -1.5,  # loudly crying face
+}
+
+# A negator flips the polarity of lexicon words in the next few tokens ("not bullish", "don't buy")
+NEGATORS: FrozenSet[str] = frozenset({
+    "not", "no", "never", "nor", "neither", "none", "nothing", "nobody", "without", "hardly", "barely",
+    "cannot", "aint", "ain't", "dont", "don't", "doesnt", "doesn't", "didnt", "didn't", "isnt", "isn't",
+    "arent", "aren't", "wasnt", "wasn't", "werent", "weren't", "wont", "won't", "cant", "can't",
+    "shouldnt", "shouldn't", "wouldnt", "wouldn't", "couldnt", "couldn't", "havent", "haven't",
+    "hasnt", "hasn't",
+})
@@ -0,0 +1,84 @@
+
+"""Process-pool scoring stage.
+
+Tokenizing is plain Python, so scoring on the producer threads competes for
+the GIL with fetching and writing. ScoringPool is a LexiconScorer whose
+`score` fans large batches out to a ProcessPoolExecutor: texts are cut into
+chunks of `chunk` (one pickled task each, to amortize IPC), `map` returns the
+results in submission order, and the concatenated scores line up with the
+input. Batches smaller than `min_parallel` are scored in-process, where the
+round trip would cost more than it saves.
+
+Workers build their own scorer once, from the parent's lexicon, in the pool
+initializer; tasks carry only texts. The pool uses the "spawn" start method
+because the collector forks from a multi-threaded process.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from .scorer import LexiconScorer
+
+_worker: Optional[LexiconScorer] = None
+
+def _init(kwargs: dict):
+    global _worker
+    _worker = LexiconScorer(**kwargs)
+
+def _score_chunk(texts: Sequence[str]) -> np.ndarray:
+    return _worker.score(texts)
+
+def _score_normalized_chunk(texts: Sequence[str]) -> np.ndarray:
+    return _worker.score_normalized(texts)
+
+class ScoringPool(LexiconScorer):
+    def __init__(self, weights: Optional[Dict[str, float]] = None, workers: int = 0, chunk: int = 2000,
+                 min_parallel: int = 4000, **kwargs):
+        super().__init__(weights, **kwargs)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk = max(1, chunk)
+        self.min_parallel = min_parallel
+        self._kwargs = dict(kwargs, weights=self.lexicon)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()   # producers of several adapters share the pool
+
+    def start(self):
+        """Spawn the workers now instead of on the first large batch."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=_init, initargs=(self._kwargs,))
+        return self
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        super().close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        return self._parallel(_score_chunk, texts) if len(texts) >= self.min_parallel else super().score(texts)
+
+    def score_normalized(self, texts: Sequence[str]) -> np.ndarray:
+        # Cache misses arrive here already normalized
+        if len(texts) >= self.min_parallel:
+            return self._parallel(_score_normalized_chunk, texts)
+        return super().score_normalized(texts)
+
+    def _parallel(self, fn, texts: Sequence[str]) -> np.ndarray:
+        pool = self.start()._pool
+        texts = list(texts)
+        # At least one chunk per worker so small-but-parallel batches still spread out
+        size = min(self.chunk, -(-len(texts) // self.workers))
+        return np.concatenate(list(pool.map(fn, [texts[i:i + size] for i in range(0, len(texts), size)])))
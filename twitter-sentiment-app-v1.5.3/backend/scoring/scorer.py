@@ -0,0 +1,181 @@
+
+"""Batched lexicon sentiment scorer.
+
+The lexicon (lexicon.py, optionally extended by a TSV file) is compiled once
+into a token -> id dict plus NumPy weight / negator tables. A batch of texts
+is tokenized into one flat id array; lookups, negation and per-text sums are
+then array operations over the whole batch instead of a loop per message:
+
+- weight of each token: `weights[ids]`;
+- negation: a token is flipped (and damped) when an odd number of negators
+  appear in the `window` tokens before it in the same text, counted with a
+  cumulative sum over the negator mask;
+- per-text sum: `np.bincount(doc, weights=...)`, squashed to -1..1 with
+  x / sqrt(x^2 + alpha).
+
+`label_batch` relabels the neutral rows of a MentionBatch that carry text
+(Reddit mentions; StockTwits messages without a Bullish/Bearish tag), so
+user-tagged sentiment is never overridden, and stores the compound score as
+the row's polarity. With a `cache` (cache.py) it scores only the texts it
+has not seen before.
+"""
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..adapters.batch import MentionBatch, NEU, SENTI_CODE
+from .cache import ScoreCache, normalize, normalized_key
+from .lexicon import NEGATORS, WEIGHTS
+
+TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?|[\U0001F300-\U0001FAFF]")
+
+def load_lexicon(path: str) -> Dict[str, float]:
+    """`token<TAB>weight` lines; blank lines and '#' comments are skipped."""
+    out: Dict[str, float] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            tok, _, w = line.rpartition("\t") if "\t" in line else line.rpartition(" ")
+            try:
+                out[tok.strip().lower()] = float(w)
+            except ValueError:
+                continue
+    return out
+
+class LexiconScorer:
+    def __init__(self, weights: Optional[Dict[str, float]] = None, negators: Iterable[str] = NEGATORS,
+                 window: int = 3, threshold: float = 0.05, alpha: float = 15.0, negation_damp: float = 0.74,
+                 max_chars: int = 2000):
+        weights = dict(WEIGHTS if weights is None else weights)
+        negators = frozenset(negators)
+        self.lexicon = weights
+        self.negators = negators
+        # id 0 = any token outside the lexicon
+        vocab = sorted(set(weights) | negators)
+        self._ids: Dict[str, int] = {t: i + 1 for i, t in enumerate(vocab)}
+        self._weights = np.zeros(len(vocab) + 1, dtype=np.float64)
+        self._negator = np.zeros(len(vocab) + 1, dtype=np.int32)
+        for t, i in self._ids.items():
+            self._weights[i] = weights.get(t, 0.0)
+            self._negator[i] = t in negators
+        self.window = window
+        self.threshold = threshold
+        self.alpha = alpha
+        self.negation_damp = negation_damp
+        self.max_chars = max_chars
+        self.cache: Optional[ScoreCache] = None
+
+    def fingerprint(self) -> str:
+        """Identifies what the scores depend on (not the label threshold), for persisted caches."""
+        spec = repr((sorted(self.lexicon.items()), sorted(self.negators), self.window, self.alpha,
+                     self.negation_damp, self.max_chars, TOKEN_RE.pattern))
+        return hashlib.blake2b(spec.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _encode(self, norms: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Flat token ids of all (normalized) texts and the token count of each."""
+        get = self._ids.get
+        find = TOKEN_RE.findall
+        ids: List[int] = []
+        lens = np.zeros(len(norms), dtype=np.int64)
+        for i, text in enumerate(norms):
+            toks = find(text[:self.max_chars])
+            lens[i] = len(toks)
+            ids.extend([get(t, 0) for t in toks])
+        return np.asarray(ids, dtype=np.int32), lens
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        """Compound score in -1..1 per text."""
+        # Same normalization as the cache key, so equal keys always mean equal scores
+        return self._score([normalize(t) for t in texts])
+
+    def score_normalized(self, texts: Sequence[str]) -> np.ndarray:
+        """`score` of texts already passed through cache.normalize."""
+        return self._score(texts)
+
+    def _score(self, texts: Sequence[str]) -> np.ndarray:
+        n = len(texts)
+        if n == 0:
+            return np.zeros(0, dtype=np.float64)
+        ids, lens = self._encode(texts)
+        if ids.size == 0:
+            return np.zeros(n, dtype=np.float64)
+        w = self._weights[ids]
+        neg = self._negator[ids]
+        # Negators among the `window` tokens before each token, not crossing into the previous text
+        cs = np.concatenate(([0], np.cumsum(neg)))
+        pos = np.arange(ids.size)
+        starts = np.repeat(np.cumsum(lens) - lens, lens)
+        flips = cs[pos] - cs[np.maximum(pos - self.window, starts)]
+        w = np.where(flips & 1, -self.negation_damp * w, w)
+        total = np.bincount(np.repeat(np.arange(n), lens), weights=w, minlength=n)
+        return total / np.sqrt(total * total + self.alpha)
+
+    def labels(self, scores: np.ndarray) -> np.ndarray:
+        """Sentiment codes (see adapters/batch.SENTI_CODE) for compound scores."""
+        out = np.full(scores.shape, NEU, dtype=np.int8)
+        out[scores >= self.threshold] = SENTI_CODE["pos"]
+        out[scores <= -self.threshold] = SENTI_CODE["neg"]
+        return out
+
+    def score_cached(self, texts: Sequence[str]) -> np.ndarray:
+        """`score`, looking every text up in the cache first and scoring each missing text once."""
+        if self.cache is None:
+            return self.score(texts)
+        norms = [normalize(t) for t in texts]
+        keys = [normalized_key(t) for t in norms]
+        first: Dict[int, int] = {}
+        for i, k in enumerate(keys):
+            first.setdefault(k, i)
+        known = self.cache.get_many(list(first))
+        self.cache.repeats(len(keys) - len(first))
+        todo = [i for k, i in first.items() if k not in known]
+        if todo:
+            fresh = self.score_normalized([norms[i] for i in todo])
+            scored = {keys[i]: float(v) for i, v in zip(todo, fresh)}
+            self.cache.put_many(scored)
+            known.update(scored)
+        return np.array([known[k] for k in keys], dtype=np.float64)
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+
+    def label_batch(self, batch: MentionBatch) -> int:
+        """Relabel neutral rows that carry text and set their scores, in place; returns how many were scored."""
+        se, sc, texts = batch.sentiments, batch.scores, batch.texts
+        rows = [i for i, (s, t) in enumerate(zip(se, texts)) if s == NEU and t]
+        if not rows:
+            return 0
+        # Rows of one Reddit post (one per ticker) share a text: score it once
+        uniq: Dict[str, int] = {}
+        slot = [uniq.setdefault(texts[i], len(uniq)) for i in rows]
+        scores = self.score_cached(list(uniq))
+        codes = self.labels(scores)
+        for i, k in zip(rows, slot):
+            se[i] = codes[k]
+            sc[i] = scores[k]
+        return len(rows)
+
+def from_config(cfg) -> Optional[LexiconScorer]:
+    """The configured scorer: None when off, in-process with SCORER_WORKERS=1, else a process pool."""
+    if getattr(cfg, "SENTIMENT_SCORER", "lexicon") != "lexicon":
+        return None
+    weights = dict(WEIGHTS)
+    if getattr(cfg, "SCORER_LEXICON", ""):
+        weights.update(load_lexicon(cfg.SCORER_LEXICON))
+    threshold = getattr(cfg, "SCORER_THRESHOLD", 0.05)
+    workers = getattr(cfg, "SCORER_WORKERS", 1)
+    if workers == 1:
+        scorer = LexiconScorer(weights, threshold=threshold)
+    else:
+        from .pool import ScoringPool
+        scorer = ScoringPool(weights, workers=workers, chunk=getattr(cfg, "SCORER_CHUNK", 2000),
+                             min_parallel=getattr(cfg, "SCORER_MIN_PARALLEL", 4000), threshold=threshold)
+    size = getattr(cfg, "SCORE_CACHE_SIZE", 0)
+    if size > 0:
+        scorer.cache = ScoreCache(size, getattr(cfg, "SCORE_CACHE_PATH", "") or None, scorer.fingerprint())
+    return scorer
@@ -31,6 +31,7 @@ def get_free_daily(tickers: Optional[List[str]]=None,
         "neg": DailyRollup.neg,
         "neu": DailyRollup.neu,
         "zscore": DailyRollup.zscore,
+        "sentiment": DailyRollup.sentiment_mean,
         "ticker": DailyRollup.ticker,
         "day": DailyRollup.day,
     }
@@ -63,6 +64,8 @@ def get_free_daily(tickers: Optional[List[str]]=None,
                 "pos": r.pos,
                 "neg": r.neg,
                 "neu": r.neu,
+                "sentiment_mean": float(r.sentiment_mean or 0.0),
+                "sentiment_var": float(r.sentiment_var or 0.0),
                 # Back-compat: include BOTH fields
                 "interest": interest_val,
                 "interest_score": interest_val,
@@ -85,6 +88,8 @@ def get_live_snapshot(limit: int=50):
                 "pos": r.pos,
                 "neg": r.neg,
                 "neu": r.neu,
+                "sentiment_mean": float(r.sentiment_mean or 0.0),
+                "sentiment_var": float(r.sentiment_var or 0.0),
                 "interest": interest_val,
                 "interest_score": interest_val,
                 "zscore": float(r.zscore or 0.0),
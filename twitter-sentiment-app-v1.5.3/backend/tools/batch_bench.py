@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Tradersecho — RawMention list vs columnar MentionBatch, per rotation
+
+- Builds synthetic StockTwits pages (30 messages per ticker) for one rotation over the tickers.
+- Parses + aggregates them once into a list of RawMention (the previous path) and once into a
+  MentionBatch (adapter `_parse` + `aggregate_batch`).
+- Reports CPU time and peak traced memory of each path; no network or database needed.
+
+Usage:
+  python backend/tools/batch_bench.py --tickers 5000
+  python backend/tools/batch_bench.py --tickers-file backend/symbols.txt --per-ticker 30 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Tuple
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(BACKEND))
+
+from backend.adapters.base import RawMention                      # noqa: E402
+from backend.adapters.batch import MentionBatch                   # noqa: E402
+from backend.adapters.stocktwits import StockTwitsAdapter          # noqa: E402
+from backend.ingest.aggregate import aggregate, aggregate_batch   # noqa: E402
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Compare per-message objects with columnar batches for one rotation.")
+    p.add_argument("--tickers", type=int, default=5000, help="Synthetic ticker count (ignored with --tickers-file).")
+    p.add_argument("--tickers-file", type=str, default=None, help="Newline-separated tickers.")
+    p.add_argument("--per-ticker", type=int, default=30, help="Messages per ticker page.")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per path; the fastest is reported.")
+    return p.parse_args()
+
+def pages(tickers: List[str], per: int) -> List[Tuple[str, dict]]:
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    out, mid = [], 1
+    for t in tickers:
+        msgs = []
+        for j in range(per):
+            ts = now - timedelta(seconds=7 * j)
+            msgs.append({"id": mid, "created_at": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                         "entities": {"sentiment": {"basic": ("Bullish", "Bearish", None)[mid % 3]}}})
+            mid += 1
+        out.append((t, {"messages": msgs}))
+    return out
+
+def legacy(data: List[Tuple[str, dict]]):
+    """The row-per-message path: one RawMention + datetime per message, then fold."""
+    items: List[RawMention] = []
+    for t, page in data:
+        for msg in page["messages"]:
+            ts = datetime.fromisoformat(msg["created_at"].replace("Z", "+00:00"))
+            basic = ((msg.get("entities") or {}).get("sentiment") or {}).get("basic")
+            senti = "pos" if basic == "Bullish" else "neg" if basic == "Bearish" else "neu"
+            items.append(RawMention(ticker=t.upper(), ts=ts.replace(tzinfo=None), sentiment=senti,
+                                    source="stocktwits", external_id=str(msg["id"])))
+    return items, aggregate(items)
+
+def columnar(data: List[Tuple[str, dict]]):
+    a = StockTwitsAdapter()
+    batch = MentionBatch(a.source_name)
+    for t, page in data:
+        a._parse(t, page, None, batch)
+    return batch, aggregate_batch(batch)
+
+def measure(fn: Callable, data, repeat: int) -> Tuple[float, int, int]:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.process_time()
+        fn(data)
+        best = min(best, time.process_time() - t0)
+    tracemalloc.start()
+    items, buckets = fn(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(buckets)
+
+def main():
+    args = parse_args()
+    if args.tickers_file:
+        with open(args.tickers_file, "r", encoding="utf-8") as f:
+            tickers = [line.strip().upper() for line in f if line.strip()]
+    else:
+        tickers = [f"T{i:05d}" for i in range(args.tickers)]
+    data = pages(tickers, args.per_ticker)
+    n = len(tickers) * args.per_ticker
+    print(f"rotation: {len(tickers)} tickers x {args.per_ticker} = {n} messages")
+    res = {}
+    for name, fn in (("RawMention list", legacy), ("MentionBatch", columnar)):
+        cpu, peak, nb = measure(fn, data, args.repeat)
+        res[name] = (cpu, peak)
+        print(f"{name:<16} cpu {cpu * 1000:8.1f} ms  ({n / max(cpu, 1e-9):,.0f} msg/s)  peak {peak / 1e6:7.1f} MB  buckets {nb}")
+    (c0, m0), (c1, m1) = res["RawMention list"], res["MentionBatch"]
+    print(f"saved per rotation: cpu {(c0 - c1) * 1000:.1f} ms ({1 - c1 / max(c0, 1e-9):.0%}), "
+          f"memory {(m0 - m1) / 1e6:.1f} MB ({1 - m1 / max(m0, 1):.0%})")
+
+if __name__ == "__main__":
+    main()
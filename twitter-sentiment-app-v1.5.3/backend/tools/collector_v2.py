@@ -6,9 +6,12 @@ Tradersecho — v2.0 Step 1b: Hardened collector_v2
 - Timezone-aware UTC.
 - Fills `mentions=1` if column exists; one-hot pos/neg/neu when present.
 - `--force-aggregated` to always include mentions/pos/neg/neu when columns exist.
+- Row layout is derived once from the detected columns; rows are plain tuples.
+- `--bulk copy` streams batches through psycopg's COPY protocol (Postgres only).
 
 Usage:
   python backend/tools/collector_v2.py --tickers-file backend/symbols.txt --simulate --batch-size 200 --sleep-sec 2 --loops 1 --force-aggregated
+  python backend/tools/collector_v2.py --tickers-file backend/symbols.txt --simulate --batch-size 5000 --sleep-sec 0 --bulk copy
 """
 import argparse
 import datetime as dt
@@ -17,7 +20,8 @@ import sys
 import time
 import uuid
 import random
-from typing import List, Iterable, Dict, Any
+from operator import itemgetter
+from typing import List, Iterable, Dict, Any, Tuple
 
 from sqlalchemy import create_engine, MetaData, Table, insert
 from sqlalchemy.engine import Engine
@@ -33,6 +37,7 @@ def parse_args():
     p.add_argument("--source", type=str, default="stocktwits", help="Source label to write into DB.")
     p.add_argument("--debug-schema", action="store_true", help="Print detected mention_minutes columns then continue.")
     p.add_argument("--force-aggregated", action="store_true", help="Always include mentions/pos/neg/neu in inserts when columns exist.")
+    p.add_argument("--bulk", choices=["insert", "copy"], default="insert", help="Write path: executemany INSERT or Postgres COPY.")
     return p.parse_args()
 
 def get_engine() -> Engine:
@@ -69,48 +74,52 @@ def detect_columns(engine: Engine, table: Table) -> Dict[str, bool]:
             "has_pos": ("pos" in cols), "has_neg": ("neg" in cols), "has_neu": ("neu" in cols),
             "has_sentiment": ("sentiment" in cols), "ts_col": ("ts" if "ts" in cols else ("timestamp" if "timestamp" in cols else None))}
 
-def _row_for_schema(d: Dict[str, bool], ticker: str, now_utc: dt.datetime, source: str, sentiment: int, force_agg: bool) -> Dict[str, Any]:
-    row: Dict[str, Any] = {}
-    if "ticker" in d["cols"]:
-        row["ticker"] = ticker
-    ts_col = d["ts_col"]
-    if ts_col:
-        row[ts_col] = now_utc.replace(tzinfo=None)  # DB col likely naive
-    if "source" in d["cols"]:
-        row["source"] = source
-    if "external_id" in d["cols"]:
-        row["external_id"] = f"sim-{source}-{ticker}-{now_utc.isoformat(timespec='minutes')}-{uuid.uuid4().hex[:8]}"
+def row_layout(d: Dict[str, Any], force_agg: bool) -> Tuple[str, ...]:
+    """Column order for simulated rows, computed once from the detected schema."""
+    cols = d["cols"]
+    layout = [c for c in ("ticker", d["ts_col"], "source", "external_id") if c and c in cols]
     include_agg = force_agg or d["has_mentions"] or d["has_pos"] or d["has_neg"] or d["has_neu"]
     if include_agg:
-        if d["has_mentions"]:
-            row["mentions"] = 1
-        if d["has_pos"]:
-            row["pos"] = 1 if sentiment == 1 else 0
-        if d["has_neg"]:
-            row["neg"] = 1 if sentiment == -1 else 0
-        if d["has_neu"]:
-            row["neu"] = 1 if sentiment == 0 else 0
+        layout += [c for c in ("mentions", "pos", "neg", "neu") if d[f"has_{c}"]]
     if d["has_sentiment"]:
-        row["sentiment"] = sentiment
-    for k in list(row.keys()):
-        if k not in d["cols"] or row[k] is None:
-            row.pop(k, None)
-    return row
+        layout.append("sentiment")
+    return tuple(layout)
 
-def simulate_insert(engine: Engine, mention_minutes: Table, tickers: List[str], source: str, debug_dict: Dict[str, bool], force_agg: bool):
+_FIELDS = ("ticker", "ts", "timestamp", "source", "external_id", "mentions", "pos", "neg", "neu", "sentiment")
+
+def row_picker(layout: Tuple[str, ...]):
+    """itemgetter that projects the full simulated record onto `layout` (returns a tuple)."""
+    idx = [_FIELDS.index(c) for c in layout]
+    get = itemgetter(*idx)
+    return get if len(idx) > 1 else (lambda rec: (get(rec),))
+
+def _record(ticker: str, now_naive: dt.datetime, stamp: str, source: str, sentiment: int) -> tuple:
+    return (ticker, now_naive, now_naive, source, f"sim-{source}-{ticker}-{stamp}-{uuid.uuid4().hex[:8]}", 1,
+            1 if sentiment == 1 else 0, 1 if sentiment == -1 else 0, 1 if sentiment == 0 else 0, sentiment)
+
+def _copy(conn, table: Table, layout: Tuple[str, ...], rows: List[tuple]):
+    raw = conn.connection.driver_connection
+    with raw.cursor() as cur:
+        with cur.copy(f"COPY {table.name} ({', '.join(layout)}) FROM STDIN") as cp:
+            for r in rows:
+                cp.write_row(r)
+
+def simulate_insert(engine: Engine, mention_minutes: Table, tickers: List[str], source: str, layout: Tuple[str, ...], bulk: str = "insert"):
     now_utc = dt.datetime.now(dt.UTC).replace(second=0, microsecond=0)
+    now_naive = now_utc.replace(tzinfo=None)  # DB col likely naive
+    stamp = now_utc.isoformat(timespec='minutes')
     sentiments = [-1, 0, 1, 0, 0, 1]
-    values = []
-    for t in tickers:
-        for _ in range(random.randint(1, 3)):
-            sent = random.choice(sentiments)
-            row = _row_for_schema(debug_dict, t, now_utc, source, sent, force_agg)
-            values.append(row)
-    if not values:
+    pick = row_picker(layout)
+    rows = [pick(_record(t, now_naive, stamp, source, random.choice(sentiments)))
+            for t in tickers for _ in range(random.randint(1, 3))]
+    if not rows:
         return 0
     with engine.begin() as conn:
-        conn.execute(insert(mention_minutes), values)
-    return len(values)
+        if bulk == "copy":
+            _copy(conn, mention_minutes, layout, rows)
+        else:
+            conn.execute(insert(mention_minutes), [dict(zip(layout, r)) for r in rows])
+    return len(rows)
 
 def main():
     args = parse_args()
@@ -120,18 +129,27 @@ def main():
     print("[collector_v2] detected columns:", sorted(list(debug_dict["cols"])))
     print("[collector_v2] has_mentions:", debug_dict["has_mentions"], "not_null_mentions:", debug_dict["not_null_mentions"])
     print("[collector_v2] ts_col:", debug_dict["ts_col"], "has_pos/neg/neu:", debug_dict["has_pos"], debug_dict["has_neg"], debug_dict["has_neu"], "has_sentiment:", debug_dict["has_sentiment"])
+    if args.bulk == "copy" and (engine.dialect.name != "postgresql" or engine.dialect.driver != "psycopg"):
+        print("ERROR: --bulk copy needs a postgresql+psycopg DB_URL.", file=sys.stderr)
+        sys.exit(2)
+    layout = row_layout(debug_dict, args.force_aggregated)
+    print("[collector_v2] row layout:", list(layout), "bulk:", args.bulk)
     tickers = read_tickers(args.tickers_file)
     for loop_idx in range(args.loops):
         total_inserted = 0
+        write_sec = 0.0
         for batch in batches(tickers, args.batch_size):
             if args.simulate:
-                inserted = simulate_insert(engine, mention_minutes, batch, args.source, debug_dict, args.force_aggregated)
+                t0 = time.perf_counter()
+                inserted = simulate_insert(engine, mention_minutes, batch, args.source, layout, args.bulk)
+                write_sec += time.perf_counter() - t0
                 total_inserted += inserted
                 print(f"[collector_v2] inserted {inserted} mentions [source={args.source}] for {len(batch)} tickers.")
             else:
                 print(f"[collector_v2] (noop) would ingest for {len(batch)} tickers from {args.source}.")
             time.sleep(args.sleep_sec)
-        print(f"[collector_v2] loop {loop_idx+1}/{args.loops} complete. Inserted total {total_inserted} mentions.")
+        rate = total_inserted / write_sec if write_sec > 0 else 0.0
+        print(f"[collector_v2] loop {loop_idx+1}/{args.loops} complete. Inserted total {total_inserted} mentions in {write_sec:.2f}s write time ({rate:.0f} rows/s).")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+Tradersecho — offline ingestion benchmark through the real adapter path
+
+- Replays a StockTwits recording (RECORD_PATH output; JSONL or .gz) with ReplayAdapter through
+  Pipeline -> seen-cache -> mention_ids dedup -> mention_minutes upsert against DB_URL.
+- `--speed 0` replays as fast as possible; 1 / 60 follow the recorded timeline.
+- `--synthesize N` first writes a deterministic recording of N tickers (seeded), so runs are
+  reproducible without ever touching the live API.
+- Rows land under source "replay" (see --source) so they stay apart from live data.
+- Synthetic messages carry text; `--spam-rate` makes that share bot posts: a few templates posted
+  across many tickers with the cashtag swapped and a word changed. The near-duplicate filter
+  (ingest/neardup.py) runs on the producer as in the collector; the summary reports what it dropped
+  and its time. `--neardup-window 0` turns it off for a baseline run.
+
+Usage:
+  python backend/tools/replay_bench.py --synthesize 2000 --pages 5 --recording /tmp/st.jsonl.gz --speed 0
+  python backend/tools/replay_bench.py --recording backend/recordings/stocktwits.jsonl.gz --speed 60
+  python backend/tools/replay_bench.py --synthesize 2000 --spam-rate 0.3 --recording /tmp/st.jsonl.gz --neardup-window 0
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(BACKEND))
+
+from backend.db import SessionLocal                                   # noqa: E402
+from backend.adapters.recording import Recorder                       # noqa: E402
+from backend.adapters.replay import ReplayAdapter                     # noqa: E402
+from backend.ingest.neardup import NearDupIndex                       # noqa: E402
+from backend.ingest.pipeline import Pipeline                          # noqa: E402
+from backend.ingest.seen import SeenCache                             # noqa: E402
+from backend.ingest.state import save_state                           # noqa: E402
+from backend.ingest.writer import WriteResult, bulk_insert_mentions, write_aggregated  # noqa: E402
+from backend.scoring.lexicon import WEIGHTS                           # noqa: E402
+
+WORDS = sorted(WEIGHTS) + ["the", "stock", "market", "today", "earnings", "i", "think", "it", "is", "going", "to",
+                           "be", "this", "week", "after", "hours", "chart", "volume", "guys", "what", "do", "you",
+                           "see", "here", "price", "target", "support", "resistance", "calls", "news", "ceo"]
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Replay a StockTwits recording through the ingestion stack.")
+    p.add_argument("--recording", type=str, required=True, help="Recording path (JSONL, optionally .gz).")
+    p.add_argument("--speed", type=float, default=0.0, help="Replay speed: 1 = real time, 60 = 60x, 0 = as fast as possible.")
+    p.add_argument("--source", type=str, default="replay", help="Source label written to the DB.")
+    p.add_argument("--per-message", action="store_true", help="Row per message instead of minute buckets.")
+    p.add_argument("--interval", type=float, default=None, help="Producer poll interval (default: 0 at --speed 0, else 1s).")
+    p.add_argument("--synthesize", type=int, default=0, help="Write a synthetic recording of N tickers first.")
+    p.add_argument("--pages", type=int, default=5, help="Synthetic pages per ticker (one every 60 recorded seconds).")
+    p.add_argument("--dup-rate", type=float, default=0.3, help="Synthetic share of messages repeated on the next page.")
+    p.add_argument("--spam-rate", type=float, default=0.2, help="Synthetic share of new messages that are bot spam.")
+    p.add_argument("--neardup-window", type=float, default=3600, help="Near-duplicate window in seconds (0 = filter off).")
+    p.add_argument("--neardup-threshold", type=float, default=0.4, help="Word-pair similarity (Jaccard) of a near-duplicate.")
+    p.add_argument("--seed", type=int, default=7)
+    return p.parse_args()
+
+class TimedNearDup(NearDupIndex):
+    seconds = 0.0
+    rows_dropped = 0
+
+    def filter(self, batch):
+        t0 = time.perf_counter()
+        kept = super().filter(batch)
+        self.seconds += time.perf_counter() - t0
+        self.rows_dropped += len(batch) - len(kept)
+        return kept
+
+def synthesize(path: str, tickers: int, pages: int, dup_rate: float, seed: int, spam_rate: float = 0.0):
+    rng = random.Random(seed)
+    spam = [[rng.choice(WORDS) for _ in range(rng.randint(10, 25))] for _ in range(20)]
+
+    def body(t: str) -> str:
+        if rng.random() < spam_rate:
+            words = list(rng.choice(spam))
+            words[rng.randrange(len(words))] = rng.choice(WORDS)
+            return f"${t} " + " ".join(words) + rng.choice(("", " 🚀", " 🚀🚀", "!!!"))
+        return f"${t} " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30)))
+
+    t0 = datetime(2025, 10, 1, 14, 30, tzinfo=timezone.utc)
+    rec = Recorder(path, flush_every=1000)
+    mid = 1
+    last = {}
+    for p in range(pages):
+        now = t0 + timedelta(seconds=60 * p)
+        for i in range(tickers):
+            t = f"T{i:05d}"
+            msgs = [m for m in last.get(t, []) if rng.random() < dup_rate]
+            for _ in range(rng.randint(0, 30 - len(msgs))):
+                ts = now - timedelta(seconds=rng.randint(0, 59))
+                msgs.append({"id": mid, "created_at": ts.strftime("%Y-%m-%dT%H:%M:%SZ"), "body": body(t),
+                             "entities": {"sentiment": {"basic": rng.choice(("Bullish", "Bearish", None))}}})
+                mid += 1
+            last[t] = msgs
+            rec.write("stocktwits", t, {"symbol": {"symbol": t}, "messages": msgs}, ts=now.timestamp())
+    rec.close()
+    print(f"synthesized {tickers * pages} pages, {mid - 1} distinct messages -> {path}")
+
+def main():
+    args = parse_args()
+    if args.synthesize:
+        if os.path.exists(args.recording):
+            os.remove(args.recording)
+        synthesize(args.recording, args.synthesize, args.pages, args.dup_rate, args.seed, args.spam_rate)
+
+    t_load = time.perf_counter()
+    a = ReplayAdapter(args.recording, speed=args.speed, source_name=args.source)
+    tickers = a.tickers()
+    print(f"loaded {a.transport.total} pages for {len(tickers)} tickers in {time.perf_counter() - t_load:.1f}s")
+
+    seen = SeenCache()
+    totals = WriteResult()
+    write_sec = 0.0
+    neardup = TimedNearDup(args.neardup_window, args.neardup_threshold) if args.neardup_window > 0 else None
+
+    def flush(batches):
+        nonlocal totals, write_sec
+        t0 = time.perf_counter()
+        entries = [(b.adapter.source_name, seen.filter(b.items), b.state) for b in batches]
+        with SessionLocal() as db:
+            for source, items, state in entries:
+                totals += bulk_insert_mentions(db, items) if args.per_message else write_aggregated(db, items)
+                save_state(db, source, state)
+            db.commit()
+        for b in batches:
+            b.adapter.ack(b.state)
+        for _, items, _ in entries:
+            seen.add(items)
+        write_sec += time.perf_counter() - t0
+
+    interval = args.interval if args.interval is not None else (0.0 if args.speed <= 0 else 1.0)
+    pipe = Pipeline([a], tickers, flush, interval=interval, since=datetime(1970, 1, 1), neardup=neardup)
+    t0 = time.perf_counter()
+    pipe.start()
+    try:
+        while not (a.exhausted and pipe.queue.empty()):
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipe.stop()
+    dt = time.perf_counter() - t0
+    st = pipe.stats
+    fetched = st.items_in + (neardup.rows_dropped if neardup is not None else 0)
+    print(f"replayed {a.transport.served} pages -> {fetched} messages in {dt:.1f}s "
+          f"({fetched / max(dt, 1e-9):,.0f} msg/s)")
+    print(f"seen-cache hit rate {seen.hit_rate:.1%} | inserted {totals.inserted}, deduped {totals.deduped}, "
+          f"buckets {totals.buckets} | {st.flushes} flushes, writer busy {write_sec:.1f}s, "
+          f"producers blocked {st.put_blocked_sec:.1f}s")
+    if neardup is not None:
+        print(f"near-dup: dropped {neardup.dropped} of {neardup.checked} checked messages ({neardup.drop_rate:.1%}), "
+              f"{len(neardup)} signatures indexed, filter {neardup.seconds:.1f}s "
+              f"({neardup.checked / max(neardup.seconds, 1e-9):,.0f} msg/s)")
+
+if __name__ == "__main__":
+    main()
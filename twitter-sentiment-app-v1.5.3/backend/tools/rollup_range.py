@@ -6,6 +6,8 @@ Tradersecho — v2.0 Step 1: rollup-range job (robust upsert)
 - Uses Postgres ON CONFLICT only if matching unique index/constraint exists.
 - Otherwise falls back to delete+insert.
 - Matches 'day' column type (DATE vs TIMESTAMP).
+- Mean / variance of polarity per ticker-day from sentiment_sum / sentiment_sq_sum, in the same GROUP BY
+  (falls back to pos=+1, neg=-1 before migration 0007; written only where daily_rollups has the columns).
 
 Usage:
   python backend/tools/rollup_range.py --days 7 --verbose
@@ -97,17 +99,28 @@ def compute_day(engine: Engine, mention_minutes: Table, daily_rollups: Table, ba
             pos_sum = func.coalesce(func.sum(mention_minutes.c.pos), 0) if "pos" in mention_minutes.c else func.sum(0)
             neg_sum = func.coalesce(func.sum(mention_minutes.c.neg), 0) if "neg" in mention_minutes.c else func.sum(0)
             neu_sum = func.coalesce(func.sum(mention_minutes.c.neu), 0) if "neu" in mention_minutes.c else func.sum(0)
+            if "sentiment_sum" in mention_minutes.c:
+                s_sum = func.coalesce(func.sum(mention_minutes.c.sentiment_sum), 0)
+                sq_sum = func.coalesce(func.sum(mention_minutes.c.sentiment_sq_sum), 0)
+            else:
+                # Labels only: polarity is +1 / -1 / 0, its square 1 / 1 / 0
+                s_sum = pos_sum - neg_sum
+                sq_sum = pos_sum + neg_sum
         else:
             if sent_col is None:
                 agg_mentions = func.count()
                 pos_sum = func.sum(0)
                 neg_sum = func.sum(0)
                 neu_sum = func.count()
+                s_sum = func.sum(0)
+                sq_sum = func.sum(0)
             else:
                 agg_mentions = func.count()
                 pos_sum = func.sum(func.case((sent_col == 1, 1), else_=0))
                 neg_sum = func.sum(func.case((sent_col == -1, 1), else_=0))
                 neu_sum = func.sum(func.case((sent_col == 0, 1), else_=0))
+                s_sum = func.sum(sent_col)
+                sq_sum = func.sum(sent_col * sent_col)
         q = (
             select(
                 ticker_col.label("ticker"),
@@ -115,6 +128,8 @@ def compute_day(engine: Engine, mention_minutes: Table, daily_rollups: Table, ba
                 pos_sum.label("pos"),
                 neg_sum.label("neg"),
                 neu_sum.label("neu"),
+                s_sum.label("s_sum"),
+                sq_sum.label("sq_sum"),
             )
             .where(and_(*conditions))
             .group_by(ticker_col)
@@ -146,6 +161,10 @@ def compute_day(engine: Engine, mention_minutes: Table, daily_rollups: Table, ba
             pos = int(r.pos or 0)
             neg = int(r.neg or 0)
             neu = int(r.neu or 0)
+            s_sum = float(r.s_sum or 0.0)
+            sq_sum = float(r.sq_sum or 0.0)
+            s_mean = s_sum / mentions if mentions else 0.0
+            s_var = max(0.0, sq_sum / mentions - s_mean * s_mean) if mentions else 0.0
             interest = mentions
             mean_std = z_by_ticker.get(r.ticker)
             if mean_std and mean_std[1] and float(mean_std[1]) > 0:
@@ -162,20 +181,17 @@ def compute_day(engine: Engine, mention_minutes: Table, daily_rollups: Table, ba
                 "interest": interest,
                 "zscore": zscore,
             }
+            for col, v in (("sentiment_sum", s_sum), ("sentiment_sq_sum", sq_sum),
+                           ("sentiment_mean", s_mean), ("sentiment_var", s_var)):
+                if col in daily_rollups.c:
+                    ins_values[col] = v
             if "source" in daily_rollups.c and source_filter:
                 ins_values["source"] = source_filter
             if can_on_conflict:
                 stmt = pg_insert(daily_rollups).values(**ins_values)
                 stmt = stmt.on_conflict_do_update(
                     index_elements=conflict_cols,
-                    set_={
-                        "mentions": mentions,
-                        "pos": pos,
-                        "neg": neg,
-                        "neu": neu,
-                        "interest": interest,
-                        "zscore": zscore,
-                    },
+                    set_={k: v for k, v in ins_values.items() if k not in conflict_cols},
                 )
                 conn.execute(stmt)
             else:
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Tradersecho — sentiment scoring throughput, in-process vs process pool
+
+- Generates N synthetic social-media texts (seeded): lexicon words, negators, cashtags, emoji and filler.
+- Scores them in-process once, then with ScoringPool at 1, 2, 4, ... up to --max-workers processes.
+- Reports msg/s and speedup per worker count, and checks every pool result matches the in-process
+  scores in order. Pool start-up (spawn) is excluded: each pool is warmed up before timing.
+- `--dup-rate` makes that share of texts reposts of earlier ones (case / spacing changed); the
+  "cached" line scores through a fresh ScoreCache each run and shows its hit ratio.
+
+Usage:
+  python backend/tools/score_bench.py --texts 200000
+  python backend/tools/score_bench.py --texts 500000 --max-workers 8 --chunk 5000 --repeat 3
+  python backend/tools/score_bench.py --texts 200000 --dup-rate 0.4 --max-workers 1
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(BACKEND))
+
+import numpy as np                                        # noqa: E402
+
+from backend.scoring.cache import ScoreCache              # noqa: E402
+from backend.scoring.lexicon import NEGATORS, WEIGHTS     # noqa: E402
+from backend.scoring.pool import ScoringPool              # noqa: E402
+from backend.scoring.scorer import LexiconScorer          # noqa: E402
+
+FILLER = ("the", "stock", "market", "today", "earnings", "i", "think", "it", "is", "going", "to", "be", "this",
+          "week", "after", "hours", "chart", "volume", "guys", "what", "do", "you", "see", "here", "price", "target")
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Measure lexicon scoring throughput from 1 to N worker processes.")
+    p.add_argument("--texts", type=int, default=200_000, help="Synthetic texts to score per run.")
+    p.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="Largest pool to try (default: cores).")
+    p.add_argument("--chunk", type=int, default=2000, help="Texts per worker task.")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per configuration; the fastest is reported.")
+    p.add_argument("--dup-rate", type=float, default=0.0, help="Share of texts that repost an earlier one.")
+    p.add_argument("--seed", type=int, default=7)
+    return p.parse_args()
+
+def synthesize(n: int, seed: int, dup_rate: float = 0.0):
+    rng = random.Random(seed)
+    words = list(WEIGHTS)
+    negs = sorted(NEGATORS)
+    out = []
+    for i in range(n):
+        if out and rng.random() < dup_rate:
+            prev = rng.choice(out)
+            out.append(prev.upper() if rng.random() < 0.5 else prev.replace(" ", "  "))
+            continue
+        toks = [f"${rng.choice(('TSLA', 'AAPL', 'NVDA', 'GME', 'AMD'))}"]
+        for _ in range(rng.randint(4, 30)):
+            r = rng.random()
+            toks.append(rng.choice(words) if r < 0.15 else rng.choice(negs) if r < 0.2 else rng.choice(FILLER))
+        out.append(" ".join(toks))
+    return out
+
+def timed(fn, texts, repeat):
+    best, res = float("inf"), None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        res = fn(texts)
+        best = min(best, time.perf_counter() - t0)
+    return best, res
+
+def main():
+    args = parse_args()
+    texts = synthesize(args.texts, args.seed, args.dup_rate)
+    print(f"{len(texts)} texts, avg {sum(map(len, texts)) / len(texts):.0f} chars, {os.cpu_count()} cores")
+
+    base_sec, base = timed(LexiconScorer().score, texts, args.repeat)
+    base_rate = len(texts) / base_sec
+    print(f"{'in-process':<12} {base_rate:>12,.0f} msg/s  1.00x")
+
+    def cached(texts):
+        scorer = LexiconScorer()
+        scorer.cache = ScoreCache(len(texts))
+        res = scorer.score_cached(texts)
+        cached.hit_rate = scorer.cache.hit_rate
+        return res
+
+    sec, res = timed(cached, texts, args.repeat)
+    rate = len(texts) / sec
+    print(f"{'cached':<12} {rate:>12,.0f} msg/s  {rate / base_rate:.2f}x  (hit ratio {cached.hit_rate:.1%})"
+          f"{'' if np.allclose(res, base) else '  MISMATCH'}")
+
+    workers = 1
+    while workers <= max(1, args.max_workers):
+        # min_parallel=0: always go through the pool, so 1 worker shows the IPC overhead
+        with ScoringPool(workers=workers, chunk=args.chunk, min_parallel=0) as pool:
+            pool.score(texts[:args.chunk * workers])  # warm up: spawn + import in every worker
+            sec, res = timed(pool.score, texts, args.repeat)
+        ok = np.allclose(res, base)
+        rate = len(texts) / sec
+        print(f"{workers:>3} worker{'s' if workers > 1 else ' '}  {rate:>12,.0f} msg/s  {rate / base_rate:.2f}x"
+              f"{'' if ok else '  MISMATCH'}")
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Tradersecho — collector cold-start cost
+
+- Runs `python -X importtime` in a fresh interpreter for the collector, then times each adapter's
+  lazy import through the registry on top of it.
+- Prints total import time and the slowest top-level packages, so regressions in cron-style
+  short-lived collector runs show up before they ship.
+
+Usage:
+  python backend/tools/startup_cost.py
+  python backend/tools/startup_cost.py --adapters stocktwits,reddit --top 15 --runs 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PARENT = os.path.dirname(BACKEND)
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Measure cold import time of the collector and its adapters.")
+    p.add_argument("--adapters", type=str, default="stocktwits,reddit", help="Adapters to measure (registry names).")
+    p.add_argument("--top", type=int, default=10, help="Show the N slowest top-level packages.")
+    p.add_argument("--runs", type=int, default=3, help="Fresh interpreters per measurement; the fastest run is reported.")
+    return p.parse_args()
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=PARENT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    res = subprocess.run([sys.executable, *args], env=env, cwd=PARENT, capture_output=True, text=True)
+    if res.returncode != 0:
+        raise RuntimeError(res.stderr.strip().splitlines()[-1] if res.stderr.strip() else "import failed")
+    return res
+
+def adapter_run(code: str) -> str:
+    return _run(["-c", code]).stdout.strip()
+
+def importtime(code: str) -> Tuple[float, Dict[str, int]]:
+    """Run `code` in a fresh interpreter; returns (total seconds, self time in us per top-level package)."""
+    res = _run(["-X", "importtime", "-c", code])
+    per_pkg: Dict[str, int] = {}
+    for line in res.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        pkg = name.strip().split(".")[0]
+        per_pkg[pkg] = per_pkg.get(pkg, 0) + int(own)
+    return sum(per_pkg.values()) / 1e6, per_pkg
+
+def best_of(code: str, runs: int) -> Tuple[float, Dict[str, int]]:
+    return min((importtime(code) for _ in range(max(1, runs))), key=lambda r: r[0])
+
+def main():
+    args = parse_args()
+    base = "import backend.collector"
+    total, pkgs = best_of(base, args.runs)
+    print(f"collector: {total * 1000:.0f} ms")
+    top: List[Tuple[str, int]] = sorted(pkgs.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+    for name, us in top:
+        print(f"  {name:<24} {us / 1000:8.1f} ms")
+    for name in [a.strip() for a in args.adapters.split(",") if a.strip()]:
+        code = (f"{base}; from backend.adapters.registry import factory, IMPORT_TIMES; "
+                f"factory({name!r}); print(IMPORT_TIMES[{name!r}])")
+        try:
+            t = min(float(adapter_run(code)) for _ in range(max(1, args.runs)))
+        except RuntimeError as e:
+            print(f"+ {name}: failed ({e})")
+            continue
+        print(f"+ {name}: {t * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()